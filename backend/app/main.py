@@ -1,51 +1,166 @@
-from fastapi import BackgroundTasks, Request, FastAPI, HTTPException, UploadFile, File, Form
+from fastapi import Request, FastAPI, HTTPException, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from contextlib import asynccontextmanager
+from functools import partial
 from pydantic import BaseModel
 from dotenv import load_dotenv
 from pathlib import Path
-import hashlib
-import json
+import asyncio
+import logging
 import os
+import time
 
 # Load env from backend/.env FIRST, before any service that reads env vars
 env_path = Path(__file__).resolve().parent.parent / ".env"
 load_dotenv(dotenv_path=env_path)
 
-from .services.pdf_parser import extract_text_from_pdf_bytes
-from .services.resume_grader import grade_resume_against_job
-from .services.scoring_engine import score_resume
-from .services.analytics import log_event
+from .services.pdf_parser import extract_text_from_pdf_bytes_async, extract_text_from_pdf_file_async, shutdown_pdf_pool, warm_up_pdf_pool
+from .services.resume_grader import grade_resume_against_job_async, parse_evaluation, stream_grade_resume_against_job
+from .services.llm import circuit_breaker, close_async_client, llm_stats, warm_up_llm
+from .services.scoring_engine import rank_resumes, score_resume, warm_up_scoring
+from .services.skill_idf import SkillIDF
+from .services.analytics import AnalyticsRecorder, STATS_WINDOWS, stats_keys
 from .middleware.redis_rate_limiter import RedisRateLimiter
-from .services.redis_client import get_redis
+from .middleware.timing import TimingMiddleware
+from .services.metrics import gauge_lines, registry, stage
+from .services.redis_client import get_redis, get_redis_bytes
+from .services.cache import TwoTierCache, LLM_CACHE_TTL, PDF_TEXT_CACHE_TTL, llm_cache_key, pdf_content_hasher
+from .services.similarity_cache import SimilarityIndex, fingerprint
+from .services.single_flight import SingleFlight
+from .services.feature_flags import FeatureFlags
+from .services.compaction import compact_resume, compaction_counters
+from .services.job_registry import Job, JobRegistry, JOB_TTL, prepare_job
+from .services.prescreen import prescreen_evaluation, record_llm_result, should_prescreen, tier_counters
+from .services.job_queue import GradingQueue
+from .services.static_assets import StaticAssets
+from .services.serialization import FastJSONResponse, RawJSON, dumps
 
 
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB — reject files larger than this before reading them
 ALLOWED_EXTENSIONS = {'.pdf'}
 MAX_RESUME_TEXT_LENGTH = 50_000   # ~10 pages of text — prevents huge prompts being sent to OpenAI
 MAX_JOB_DESC_LENGTH = 20_000      # same reason — keeps API costs predictable
+BATCH_MAX_RESUMES = int(os.getenv("BATCH_MAX_RESUMES", "100"))   # resumes per batch request
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))     # resumes graded at once per batch
+RANK_MAX_RESUMES = int(os.getenv("RANK_MAX_RESUMES", "5000"))     # resumes per ranking request (local scoring only)
+# Characters per ranking request, all resumes together. Scoring is pure Python and holds
+# the GIL for ~0.2s per million characters, which stalls every other request in the worker.
+RANK_MAX_TOTAL_CHARS = int(os.getenv("RANK_MAX_TOTAL_CHARS", "1000000"))
+
+logger = logging.getLogger(__name__)
 
 # Absolute path to the frontend/ folder so FastAPI can serve HTML files
 FRONTEND_DIR = Path(__file__).resolve().parents[2] / "frontend"
 
+# Frontend files fingerprinted, precompressed and held in memory (loaded during warm-up)
+static_assets = StaticAssets(FRONTEND_DIR)
+
 # Single shared Redis connection used for both rate limiting and caching
 redis = get_redis()
 
-# Limit each IP to 10 requests per hour to prevent API abuse and control OpenAI costs
+# Limit each IP to 10 requests per hour to prevent API abuse and control OpenAI costs.
+# Every grading route (sync, stream, async; text and PDF) draws from one shared budget.
+GRADE_RATE_LIMIT_SCOPE = "grade"
 rate_limiter = RedisRateLimiter(
     redis=redis,
     max_requests=int(os.getenv("RATE_LIMIT_MAX", "10")),
     window_seconds=int(os.getenv("RATE_LIMIT_WINDOW", "3600")),
 )
 
+# LLM evaluations and extracted resume text: in-process LRU in front of Redis.
+# Values are stored compressed, so these use the raw-bytes Redis client.
+# Evaluations are kept as encoded JSON, so a hit is copied into the response without parsing.
+llm_cache = TwoTierCache(get_redis_bytes(), raw=True)
+pdf_text_cache = TwoTierCache(get_redis_bytes(), prefix="pdf_text:", ttl=PDF_TEXT_CACHE_TTL, local_size=256)
+
+# Finds cached evaluations of near-identical resumes (typo fixes, re-exported PDFs) for the same job
+similarity_index = SimilarityIndex(get_redis_bytes(), ttl=LLM_CACHE_TTL)
+
+# Registered job descriptions with their skills and prompt prefix precomputed
+job_registry = JobRegistry(TwoTierCache(get_redis_bytes(), prefix="job:", ttl=JOB_TTL, local_size=256))
+
+# Skill document frequencies across every distinct JD, shared in Redis so all workers rank alike
+job_idf = SkillIDF(redis)
+
+# Batches are charged one unit per resume, against a separate (larger) budget
+batch_rate_limiter = RedisRateLimiter(
+    redis=redis,
+    max_requests=int(os.getenv("BATCH_RATE_LIMIT_MAX", "500")),
+    window_seconds=int(os.getenv("RATE_LIMIT_WINDOW", "3600")),
+)
+
+# Kill switch and other flags, cached locally and kept in sync over Redis pub/sub
+feature_flags = FeatureFlags(redis)
+
+# Usage stats are buffered in memory and written to Redis in batches
+analytics = AnalyticsRecorder(redis)
+
+# Deduplicates identical grading requests that arrive while one is already in flight
+single_flight = SingleFlight(redis)
+
+# Submit/poll mode: requests queued on a Redis Stream, graded by `python -m app.worker`
+grading_queue = GradingQueue(get_redis_bytes())
+
+
+# Set by the lifespan once warm_up() has finished — /ready answers 503 until then
+readiness: dict = {"ready": False, "warm_up_seconds": {}}
+
+
+async def _warm_up_redis() -> None:
+    # Opens a connection in each pool now instead of during the first request
+    await asyncio.wait_for(asyncio.gather(redis.ping(), get_redis_bytes().ping()), timeout=5)
+
+
+async def warm_up() -> dict[str, float]:
+    """
+    Loads what the first requests would otherwise pay for and returns the
+    seconds each step took. Every step is also done lazily on first use, so a
+    failing step is logged and skipped (e.g. Redis down — the app fails open).
+    The PDF pool goes first: its processes are forked before the OpenAI SDK
+    and NumPy are imported, so they stay small.
+    """
+    steps = {
+        "pdf_pool": warm_up_pdf_pool,
+        "static_assets": partial(asyncio.to_thread, static_assets.load),
+        "scoring": partial(asyncio.to_thread, warm_up_scoring),
+        "llm": partial(asyncio.to_thread, warm_up_llm),
+        "redis": _warm_up_redis,
+    }
+    timings = {}
+    for name, step in steps.items():
+        start = time.perf_counter()
+        try:
+            await step()
+        except Exception as e:
+            logger.warning("Warm-up step %s failed: %s", name, e)
+        timings[name] = round(time.perf_counter() - start, 3)
+    return timings
+
+
+async def _warm_up_then_ready() -> None:
+    readiness["warm_up_seconds"] = await warm_up()
+    readiness["ready"] = True
+    logger.info("Warm-up finished: %s", readiness["warm_up_seconds"])
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     if not os.getenv("OPENAI_API_KEY"):
         raise RuntimeError("OPENAI_API_KEY is not set. Add it to your .env file.")
+    analytics.start()
+    feature_flags.start()
+    job_idf.start()
+    # In the background, so /health answers as soon as the server is listening
+    warm_up_task = asyncio.create_task(_warm_up_then_ready())
     yield
+    warm_up_task.cancel()
+    await feature_flags.stop()
+    await job_idf.stop()
+    await analytics.stop()
+    await close_async_client()
+    shutdown_pdf_pool()
 
 
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
@@ -77,26 +192,29 @@ app.add_middleware(
     allow_headers=["Content-Type"],
 )
 
+# Per-stage timings → /metrics histograms and the Server-Timing header
+app.add_middleware(TimingMiddleware)
+
 
 # ---------------------------
 # Frontend
 # ---------------------------
 
 @app.get("/")
-def serve_index():
-    return FileResponse(FRONTEND_DIR / "index.html")
+async def serve_index(request: Request):
+    return static_assets.response(request, "index.html")
 
 @app.get("/login")
-def serve_login():
-    return FileResponse(FRONTEND_DIR / "login.html")
+async def serve_login(request: Request):
+    return static_assets.response(request, "login.html")
 
 @app.get("/dashboard")
-def serve_dashboard():
-    return FileResponse(FRONTEND_DIR / "dashboard.html")
+async def serve_dashboard(request: Request):
+    return static_assets.response(request, "dashboard.html")
 
 @app.get("/grader")
-def serve_grader():
-    return FileResponse(FRONTEND_DIR / "grader.html")
+async def serve_grader(request: Request):
+    return static_assets.response(request, "grader.html")
 
 @app.get("/config")
 def get_config():
@@ -115,21 +233,43 @@ def get_config():
 
 @app.get("/health")
 def health():
+    """Liveness: the process is up and serving. Doesn't wait for warm-up."""
     return {"status": "ok"}
 
 
+@app.get("/ready")
+def ready():
+    """Readiness: warm-up has finished, so requests won't pay for SDK imports or forking the PDF pool."""
+    if not readiness["ready"]:
+        raise HTTPException(status_code=503, detail="Warming up")
+    return {"status": "ready", "warm_up_seconds": readiness["warm_up_seconds"]}
+
+
 # ---------------------------
 # AI Kill Switch
 # ---------------------------
 
 async def ai_is_enabled() -> bool:
-    """Returns False if the kill switch has been triggered, True otherwise."""
+    """Returns False if the kill switch has been triggered or OpenAI is failing, True otherwise."""
+    # Breaker open — fail fast here, before compaction and cache work
+    if circuit_breaker.is_open:
+        return False
+    # Served from process memory; Redis is only read when the local copy expires
+    val = await feature_flags.get("killswitch:ai_enabled")
+    # If the key doesn't exist yet (or Redis is down), treat AI as enabled (default on)
+    return val != "0"
+
+
+async def trip_kill_switch() -> None:
+    """Called by the LLM circuit breaker when OpenAI keeps failing after repeated probes."""
+    logger.error("OpenAI failing persistently — turning the AI kill switch on. Re-enable via /admin/ai/enable.")
     try:
-        val = await redis.get("killswitch:ai_enabled")
-        # If the key doesn't exist yet, treat AI as enabled (default on)
-        return val != b"0"
+        await feature_flags.set("killswitch:ai_enabled", "0")
     except Exception:
-        return True  # if Redis is down, don't block requests
+        logger.exception("Could not set the AI kill switch")
+
+
+circuit_breaker.on_sustained_failure = trip_kill_switch
 
 
 @app.post("/admin/ai/disable")
@@ -138,7 +278,8 @@ async def disable_ai(key: str = ""):
     secret = os.getenv("STATS_SECRET", "")
     if not secret or key != secret:
         raise HTTPException(status_code=403, detail="Forbidden")
-    await redis.set("killswitch:ai_enabled", "0")
+    # Published to every replica, so it takes effect everywhere within milliseconds
+    await feature_flags.set("killswitch:ai_enabled", "0")
     return {"ai_enabled": False, "message": "AI calls disabled. Users will see a maintenance message."}
 
 
@@ -148,173 +289,672 @@ async def enable_ai(key: str = ""):
     secret = os.getenv("STATS_SECRET", "")
     if not secret or key != secret:
         raise HTTPException(status_code=403, detail="Forbidden")
-    await redis.set("killswitch:ai_enabled", "1")
+    await feature_flags.set("killswitch:ai_enabled", "1")
     return {"ai_enabled": True, "message": "AI calls re-enabled."}
 
 
 @app.get("/stats")
-async def get_stats(key: str = ""):
+async def get_stats(key: str = "", window: str = "all", limit: int = 50):
     # Require a secret key so this endpoint isn't publicly readable.
     # Set STATS_SECRET in Railway env vars. Access via /stats?key=yoursecret
+    # Optional: &window=hour|day|all (current UTC hour/day) and &limit=N top users
     stats_secret = os.getenv("STATS_SECRET", "")
     if not stats_secret or key != stats_secret:
         raise HTTPException(status_code=403, detail="Forbidden")
+    if window not in STATS_WINDOWS:
+        raise HTTPException(status_code=400, detail=f"Invalid window. Allowed: {', '.join(STATS_WINDOWS)}")
+    limit = max(1, min(limit, 1000))
+
+    total_key, unique_key, users_key = stats_keys(window)
     try:
-        total = await redis.get("stats:total_requests")
-        unique = await redis.pfcount("stats:unique_ips")
-        per_ip = await redis.hgetall("stats:per_ip")
+        # Top-K straight from the sorted set — O(log N + K), no full scan
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.get(total_key)
+            pipe.pfcount(unique_key)
+            pipe.zrevrange(users_key, 0, limit - 1, withscores=True)
+            total, unique, top_users = await pipe.execute()
     except Exception:
         raise HTTPException(status_code=503, detail="Stats unavailable")
 
-    top_users = sorted(per_ip.items(), key=lambda x: int(x[1]), reverse=True)
-
     return {
+        "window": window,
         "total_requests": int(total) if total else 0,
         "unique_visitors": unique,
         "top_users": [{"id": k, "uses": int(v)} for k, v in top_users],
+        # per-worker counters since the last restart
+        "cache": {"llm": llm_cache.stats(), "pdf_text": pdf_text_cache.stats()},
+        "grading_tiers": dict(tier_counters),
+        "prompt_compaction": dict(compaction_counters),
+        "llm": llm_stats(),
     }
 
 
+def _collect_app_metrics():
+    """Values already counted elsewhere (caches, grading tiers, compaction, LLM limiter), read at scrape time."""
+    caches = {"llm": llm_cache.stats(), "pdf_text": pdf_text_cache.stats()}
+    yield from gauge_lines(
+        "cache_requests_total", "Cache lookups by result.",
+        {
+            (name, result): stats[key]
+            for name, stats in caches.items()
+            for result, key in (("local_hit", "local_hits"), ("redis_hit", "redis_hits"), ("miss", "misses"))
+        },
+        ("cache", "result"), kind="counter",
+    )
+    yield from gauge_lines(
+        "cache_bytes_total", "Compressed bytes moved to and from Redis.",
+        {
+            (name, direction): stats[f"bytes_{direction}"]
+            for name, stats in caches.items()
+            for direction in ("read", "written")
+        },
+        ("cache", "direction"), kind="counter",
+    )
+    yield from gauge_lines(
+        "grading_tier_total", "Evaluations by the tier that produced them.",
+        {(tier,): count for tier, count in tier_counters.items() if ":" not in tier},
+        ("tier",), kind="counter",
+    )
+    yield from gauge_lines(
+        "prompt_compaction_tokens_total", "Estimated prompt tokens before and after compaction.",
+        {("before",): compaction_counters["tokens_before"], ("after",): compaction_counters["tokens_after"]},
+        ("phase",), kind="counter",
+    )
+    llm = llm_stats()
+    yield from gauge_lines("llm_concurrency_limit", "Current adaptive limit for OpenAI calls.", {(): llm["concurrency"]["limit"]})
+    yield from gauge_lines("llm_in_flight", "OpenAI calls in progress.", {(): llm["concurrency"]["in_flight"]})
+    yield from gauge_lines(
+        "llm_circuit_breaker_open", "1 while the OpenAI circuit breaker rejects calls.",
+        {(): int(llm["circuit_breaker"]["state"] == "open")},
+    )
+
+
+registry.add_collector(_collect_app_metrics)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics(key: str = ""):
+    """Prometheus text format. Same secret as /stats (scrape config: params: {key: [...]})."""
+    stats_secret = os.getenv("STATS_SECRET", "")
+    if not stats_secret or key != stats_secret:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+# ---------------------------
+# Cached grading
+# ---------------------------
+
+async def find_similar_evaluation(job: Job, resume_text: str):
+    """
+    Near-duplicate tier. Returns (fingerprint, evaluation): the evaluation of the most
+    similar resume already graded for this job, or None. The fingerprint is passed back
+    so a fresh LLM result can be indexed without hashing the text again.
+    """
+    if not similarity_index.enabled:
+        return None, None
+
+    signature = fingerprint(resume_text)
+    match = await similarity_index.lookup(job.key, signature)
+    if match is None:
+        return signature, None
+
+    neighbor_key, similarity = match
+    evaluation = await llm_cache.get(neighbor_key)
+    if evaluation is None:
+        return signature, None  # fingerprint outlived its evaluation
+
+    tier_counters["approximate"] += 1
+    return signature, RawJSON(dumps({**evaluation.decode(), "approximate_match": True, "similarity": round(similarity, 3)}))
+
+
+async def get_or_grade(job: Job, resume_text: str, keyword_score: dict) -> RawJSON:
+    """
+    Grading cascade:
+    1. keyword pre-screen — obvious mismatches get a local evaluation, no OpenAI call
+    2. cache — same JD + resume graded before
+    3. near-duplicate cache — an almost identical resume graded for the same JD
+    4. OpenAI, only on a miss
+    Returns the evaluation already encoded; responses embed it as-is.
+    """
+    if should_prescreen(keyword_score):
+        tier_counters["prescreen"] += 1
+        return RawJSON(dumps(prescreen_evaluation(keyword_score)))
+
+    # Only the compacted text goes to OpenAI (repeated headers, page numbers and
+    # low-value sections removed, trimmed to a token budget)
+    with stage("compaction"):
+        resume_text = compact_resume(resume_text)
+
+    # Build a cache key by hashing the job description + resume text together.
+    # Same inputs = same hash = return cached result instead of calling OpenAI again.
+    with stage("cache_lookup"):
+        cache_key = llm_cache_key(job.job_description, resume_text, job.normalized)
+        evaluation = await llm_cache.get(cache_key)
+    if evaluation is not None:
+        tier_counters["cache"] += 1
+        return evaluation  # cache hit — skip OpenAI call
+
+    with stage("similarity_lookup"):
+        signature, evaluation = await find_similar_evaluation(job, resume_text)
+    if evaluation is not None:
+        return evaluation
+
+    async def _grade() -> RawJSON:
+        # Cache miss — check kill switch before calling OpenAI
+        if not await ai_is_enabled():
+            raise HTTPException(status_code=503, detail="AI grading is temporarily unavailable. Please try again later.")
+        evaluation = await grade_resume_against_job_async(job.job_description, resume_text, job.messages)
+        tier_counters["llm"] += 1
+        record_llm_result(keyword_score, evaluation.match_score)
+        encoded = evaluation.to_json()
+        await llm_cache.set(cache_key, encoded)
+        if signature is not None:
+            await similarity_index.add(job.key, cache_key, signature)
+        return encoded
+
+    # Double-clicks, retries and popular postings often send the same inputs at once.
+    # Only one of them calls OpenAI; the rest wait for its result.
+    with stage("llm"):
+        return await single_flight.run(cache_key, _grade, lambda: llm_cache.get(cache_key))
+
+
 # ---------------------------
 # Pydantic Models
 # ---------------------------
 
 class MatchRequest(BaseModel):
-    job_description: str
+    # Send either the full job description or the job_id returned by POST /jobs
+    job_description: str | None = None
+    job_id: str | None = None
     resume_text: str
 
 
-@app.post("/grade_resume/")
-async def grade_resume(http_request: Request, request: MatchRequest):
+class JobRequest(BaseModel):
+    job_description: str
+
+
+class RankRequest(BaseModel):
+    job_description: str | None = None
+    job_id: str | None = None
+    resume_texts: list[str]
+    top_k: int | None = None
+
+
+# ---------------------------
+# Job Registry
+# ---------------------------
+
+async def resolve_job(job_description: str | None, job_id: str | None) -> Job:
+    """Returns the prepared job for a request that sent either a job_id or the full text."""
+    if job_id:
+        job = await job_registry.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Unknown job_id. Register the job description again.")
+        return job
+
+    if not job_description:
+        raise HTTPException(status_code=400, detail="Provide job_description or job_id.")
+    if len(job_description) > MAX_JOB_DESC_LENGTH:
+        raise HTTPException(status_code=400, detail="Job description too long.")
+    job = prepare_job(job_description)
+    # Every distinct JD feeds the skill IDF used by v2 ranking (queued, written in the background)
+    job_idf.observe(job.key, job.skills)
+    return job
+
+
+@app.post("/jobs")
+async def register_job(http_request: Request, request: JobRequest):
+    """Registers a job description once; grade against it later with just the returned job_id."""
     await rate_limiter.check_rate_limit(http_request)
 
     if len(request.job_description) > MAX_JOB_DESC_LENGTH:
         raise HTTPException(status_code=400, detail="Job description too long.")
 
-    cache_key = "llm_cache:" + hashlib.md5(
-        (request.job_description + "||" + request.resume_text).encode()
-    ).hexdigest()
+    job = await job_registry.register(request.job_description)
+    job_idf.observe(job.key, job.skills)
+    return {"job_id": job.job_id, "skills": sorted(job.skills)}
 
-    evaluation = None
-    try:
-        cached = await redis.get(cache_key)
-        if cached:
-            evaluation = json.loads(cached)
-    except Exception:
-        pass
 
-    if evaluation is None:
-        if not await ai_is_enabled():
-            raise HTTPException(status_code=503, detail="AI grading is temporarily unavailable. Please try again later.")
-        evaluation = grade_resume_against_job(
-            job_description=request.job_description,
-            resume_text=request.resume_text,
-        )
-        try:
-            await redis.set(cache_key, json.dumps(evaluation), ex=86400)
-        except Exception:
-            pass
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await job_registry.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job_id.")
+    return {"job_id": job.job_id, "skills": sorted(job.skills), "length": len(job.job_description)}
 
-    keyword_score = score_resume(request.resume_text, request.job_description)
-    return {"evaluation": evaluation, "keyword_score": keyword_score}
 
+@app.post("/grade_resume/")
+async def grade_resume(http_request: Request, request: MatchRequest):
+    with stage("rate_limit"):
+        await rate_limiter.check_rate_limit(http_request, scope=GRADE_RATE_LIMIT_SCOPE)
 
-# ---------------------------
-# PDF Upload Endpoint
-# ---------------------------
+    with stage("job"):
+        job = await resolve_job(request.job_description, request.job_id)
 
-@app.post("/grade_resume_pdf/")
-async def grade_resume_pdf(
-    request: Request,
-    background_tasks: BackgroundTasks,
-    job_description: str = Form(...),
-    resume_pdf: UploadFile = File(...),
-):
-    await rate_limiter.check_rate_limit(request)
+    # keyword_score runs locally first — it decides whether OpenAI is needed at all
+    with stage("keyword_score"):
+        keyword_score = score_resume(request.resume_text, job.job_description, job_skills=job.skills)
+    evaluation = await get_or_grade(job, request.resume_text, keyword_score)
 
-    background_tasks.add_task(
-        log_event,
-        "resume_analysis",
-        request.client.host if request.client else None,
-        redis,
-    )
+    return FastJSONResponse({"evaluation": evaluation, "keyword_score": keyword_score})
 
-    if len(job_description) > MAX_JOB_DESC_LENGTH:
-        raise HTTPException(status_code=400, detail="Job description too long.")
 
-    if not resume_pdf.filename:
+# ---------------------------
+# PDF Upload Endpoint
+# ---------------------------
+
+async def read_pdf_upload(upload: UploadFile) -> str:
+    """
+    Validates an uploaded resume and returns the SHA-256 of its content.
+    The bytes are never collected in memory — Starlette has already spooled the
+    upload, so we only stream through it once and leave the file for pypdf.
+    """
+    if not upload.filename:
         raise HTTPException(status_code=400, detail="No filename provided")
 
-    file_ext = Path(resume_pdf.filename).suffix.lower()
+    file_ext = Path(upload.filename).suffix.lower()
     if file_ext not in ALLOWED_EXTENSIONS:
         raise HTTPException(
             status_code=400,
             detail=f"Invalid file type. Allowed: {', '.join(ALLOWED_EXTENSIONS)}",
         )
 
+    # Starlette knows the size up front — reject oversized files before reading anything
+    if upload.size is not None and upload.size > MAX_FILE_SIZE:
+        raise HTTPException(status_code=413, detail="File too large. Maximum size is 10MB.")
+
     file_size = 0
     chunk_size = 1024 * 1024  # Read 1MB at a time instead of loading the whole file at once
-    chunks: list[bytes] = []
+    hasher = pdf_content_hasher()
 
-    # Stream the file in chunks so we can reject oversized files early
-    # without holding the entire upload in memory first
+    # Stream the file in chunks, hashing as we go; only one chunk is held at a time
     while True:
-        chunk = await resume_pdf.read(chunk_size)
+        chunk = await upload.read(chunk_size)
         if not chunk:
             break
+        if file_size == 0:
+            # Check the first 4 bytes — every valid PDF starts with "%PDF"
+            # This catches users who rename a .docx or image to .pdf
+            if not chunk.startswith(b"%PDF"):
+                raise HTTPException(status_code=400, detail="Uploaded file is not a valid PDF.")
         file_size += len(chunk)
         if file_size > MAX_FILE_SIZE:
             raise HTTPException(status_code=413, detail="File too large. Maximum size is 10MB.")
-        chunks.append(chunk)
-
-    pdf_bytes = b"".join(chunks)
+        hasher.update(chunk)
 
-    # Check the first 4 bytes — every valid PDF starts with "%PDF"
-    # This catches users who rename a .docx or image to .pdf
-    if not pdf_bytes.startswith(b"%PDF"):
+    if file_size == 0:
         raise HTTPException(status_code=400, detail="Uploaded file is not a valid PDF.")
 
-    resume_text = extract_text_from_pdf_bytes(pdf_bytes)
+    return hasher.hexdigest()
+
+
+async def resume_text_from_pdf(pdf: UploadFile | bytes, pdf_hash: str) -> str:
+    """
+    Returns the resume text for a validated upload (or its bytes, for queued tasks),
+    from cache when this file was seen before.
+    """
+    # Same file uploaded before (usually against another posting) — reuse its text
+    with stage("pdf_cache"):
+        resume_text = await pdf_text_cache.get(pdf_hash)
+
+    if resume_text is None:
+        # Parsed in a worker process; stops early once the text passes the length limit
+        with stage("pdf_extract"):
+            if isinstance(pdf, bytes):
+                resume_text = await extract_text_from_pdf_bytes_async(pdf, max_chars=MAX_RESUME_TEXT_LENGTH)
+            else:
+                resume_text = await extract_text_from_pdf_file_async(pdf.file, max_chars=MAX_RESUME_TEXT_LENGTH)
+
+        if len(resume_text) > MAX_RESUME_TEXT_LENGTH:
+            raise HTTPException(status_code=400, detail="Resume text too long. Please submit a concise resume.")
+
+        await pdf_text_cache.set(pdf_hash, resume_text)
 
-    if len(resume_text) > MAX_RESUME_TEXT_LENGTH:
+    return resume_text
+
+
+@app.post("/grade_resume_pdf/")
+async def grade_resume_pdf(
+    request: Request,
+    job_description: str | None = Form(None),
+    job_id: str | None = Form(None),
+    resume_pdf: UploadFile = File(...),
+):
+    with stage("rate_limit"):
+        await rate_limiter.check_rate_limit(request, scope=GRADE_RATE_LIMIT_SCOPE)
+
+    with stage("job"):
+        job = await resolve_job(job_description, job_id)
+
+    with stage("upload_read"):
+        pdf_hash = await read_pdf_upload(resume_pdf)
+    resume_text = await resume_text_from_pdf(resume_pdf, pdf_hash)
+
+    # keyword_score runs locally (no API call) — counts matched/missing skills.
+    # Computed first because it decides whether OpenAI is needed at all.
+    with stage("keyword_score"):
+        keyword_score = score_resume(resume_text, job.job_description, job_skills=job.skills)
+    evaluation = await get_or_grade(job, resume_text, keyword_score)
+
+    # Only successful analyses are counted
+    analytics.record("resume_analysis", request.client.host if request.client else None)
+
+    return FastJSONResponse({
+        "evaluation": evaluation,
+        "keyword_score": keyword_score,
+        "resume_preview": resume_text[:800],  # first 800 chars shown in UI as a preview
+    })
+
+
+# ---------------------------
+# Queued Endpoints (submit, then poll GET /tasks/{task_id})
+# ---------------------------
+
+def _job_fields(job_description: str | None, job_id: str | None) -> dict[str, str]:
+    return {"job_id": job_id} if job_id else {"job_description": job_description}
+
+
+@app.post("/grade_resume/async", status_code=202)
+async def submit_grade_resume(http_request: Request, request: MatchRequest):
+    await rate_limiter.check_rate_limit(http_request, scope=GRADE_RATE_LIMIT_SCOPE)
+
+    # Validate now so bad requests fail immediately instead of in the worker —
+    # and so an oversized resume never gets written into the stream
+    if len(request.resume_text) > MAX_RESUME_TEXT_LENGTH:
         raise HTTPException(status_code=400, detail="Resume text too long. Please submit a concise resume.")
+    await resolve_job(request.job_description, request.job_id)
 
-    # Build a cache key by hashing the job description + resume text together.
-    # Same inputs = same hash = return cached result instead of calling OpenAI again.
-    cache_key = "llm_cache:" + hashlib.md5(
-        (job_description + "||" + resume_text).encode()
-    ).hexdigest()
+    task_id = await grading_queue.submit(
+        {**_job_fields(request.job_description, request.job_id), "resume_text": request.resume_text}
+    )
+    return {"task_id": task_id, "status": "queued"}
 
-    evaluation = None
-    try:
-        cached = await redis.get(cache_key)
-        if cached:
-            evaluation = json.loads(cached)  # cache hit — skip OpenAI call
-    except Exception:
-        pass  # if Redis is down, just continue without caching
 
-    if evaluation is None:
-        # Cache miss — check kill switch before calling OpenAI
+@app.post("/grade_resume_pdf/async", status_code=202)
+async def submit_grade_resume_pdf(
+    request: Request,
+    job_description: str | None = Form(None),
+    job_id: str | None = Form(None),
+    resume_pdf: UploadFile = File(...),
+):
+    await rate_limiter.check_rate_limit(request, scope=GRADE_RATE_LIMIT_SCOPE)
+
+    await resolve_job(job_description, job_id)
+    pdf_hash = await read_pdf_upload(resume_pdf)
+
+    pdf = None
+    if await pdf_text_cache.get(pdf_hash) is None:
+        # Not parsed before — the worker needs the file itself
+        resume_pdf.file.seek(0)
+        pdf = await asyncio.to_thread(resume_pdf.file.read)
+
+    task_id = await grading_queue.submit({**_job_fields(job_description, job_id), "pdf_hash": pdf_hash}, attachment=pdf)
+    analytics.record("resume_analysis", request.client.host if request.client else None)
+    return {"task_id": task_id, "status": "queued"}
+
+
+@app.get("/tasks/{task_id}")
+async def get_task(task_id: str):
+    """status: queued | processing | done (with result) | failed (with error)"""
+    task = await grading_queue.status(task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired task_id.")
+    return FastJSONResponse(task)
+
+
+async def run_grading_task(payload: dict[str, bytes]) -> dict:
+    """Worker-side handler: does what the synchronous endpoints do and returns the same response body."""
+    fields = {k: v.decode() for k, v in payload.items() if k != "attachment"}
+    job = await resolve_job(fields.get("job_description"), fields.get("job_id"))
+
+    if "attachment" in payload:
+        resume_text = await resume_text_from_pdf(payload["attachment"], fields["pdf_hash"])
+    elif "pdf_hash" in fields:
+        # Text was cached at submit time, so the file itself wasn't queued
+        resume_text = await pdf_text_cache.get(fields["pdf_hash"])
+        if resume_text is None:
+            raise HTTPException(status_code=410, detail="Uploaded file expired. Please upload it again.")
+    else:
+        resume_text = fields["resume_text"]
+
+    keyword_score = score_resume(resume_text, job.job_description, job_skills=job.skills)
+    evaluation = await get_or_grade(job, resume_text, keyword_score)
+
+    result = {"evaluation": evaluation, "keyword_score": keyword_score}
+    if "pdf_hash" in fields:
+        result["resume_preview"] = resume_text[:800]
+    return result
+
+
+# ---------------------------
+# Streaming Endpoints (Server-Sent Events)
+# ---------------------------
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {dumps(data).decode()}\n\n"
+
+
+async def _stream_grading(job: Job, resume_text: str, resume_preview: str | None = None):
+    """
+    SSE events, in order:
+    - "keyword_score": local score (+ resume preview) — available immediately
+    - "llm_delta": raw JSON chunks from the model as they arrive (cache miss only)
+    - "evaluation": the full, validated evaluation — same shape as the non-streaming endpoints
+    - "error": sent instead of "evaluation" if grading fails
+    """
+    keyword_score = score_resume(resume_text, job.job_description, job_skills=job.skills)
+    first = {"keyword_score": keyword_score}
+    if resume_preview is not None:
+        first["resume_preview"] = resume_preview
+    yield _sse("keyword_score", first)
+
+    if should_prescreen(keyword_score):
+        tier_counters["prescreen"] += 1
+        yield _sse("evaluation", prescreen_evaluation(keyword_score))
+        return
+
+    # Headers are already sent, so these stages reach /metrics but not Server-Timing
+    with stage("compaction"):
+        resume_text = compact_resume(resume_text)
+    with stage("cache_lookup"):
+        cache_key = llm_cache_key(job.job_description, resume_text, job.normalized)
+        evaluation = await llm_cache.get(cache_key)
+    if evaluation is not None:
+        tier_counters["cache"] += 1
+        yield _sse("evaluation", evaluation)
+        return
+
+    with stage("similarity_lookup"):
+        signature, evaluation = await find_similar_evaluation(job, resume_text)
+    if evaluation is not None:
+        yield _sse("evaluation", evaluation)
+        return
+
+    try:
         if not await ai_is_enabled():
             raise HTTPException(status_code=503, detail="AI grading is temporarily unavailable. Please try again later.")
-        evaluation = grade_resume_against_job(job_description, resume_text)
+
+        chunks: list[str] = []
+        async for delta in stream_grade_resume_against_job(job.job_description, resume_text, job.messages):
+            chunks.append(delta)
+            yield _sse("llm_delta", {"text": delta})
+
+        # Validate the assembled output and cache it like the non-streaming path does
+        evaluation = parse_evaluation("".join(chunks))
+        tier_counters["llm"] += 1
+        record_llm_result(keyword_score, evaluation.match_score)
+        encoded = evaluation.to_json()
+        await llm_cache.set(cache_key, encoded)
+        if signature is not None:
+            await similarity_index.add(job.key, cache_key, signature)
+    except HTTPException as e:
+        yield _sse("error", {"status": e.status_code, "detail": e.detail})
+        return
+
+    yield _sse("evaluation", encoded)
+
+
+@app.post("/grade_resume/stream")
+async def grade_resume_stream(http_request: Request, request: MatchRequest):
+    await rate_limiter.check_rate_limit(http_request, scope=GRADE_RATE_LIMIT_SCOPE)
+
+    job = await resolve_job(request.job_description, request.job_id)
+
+    return StreamingResponse(
+        _stream_grading(job, request.resume_text),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/grade_resume_pdf/stream")
+async def grade_resume_pdf_stream(
+    request: Request,
+    job_description: str | None = Form(None),
+    job_id: str | None = Form(None),
+    resume_pdf: UploadFile = File(...),
+):
+    await rate_limiter.check_rate_limit(request, scope=GRADE_RATE_LIMIT_SCOPE)
+
+    job = await resolve_job(job_description, job_id)
+
+    # Upload and extraction errors are still plain HTTP errors — the stream only starts once we have text
+    pdf_hash = await read_pdf_upload(resume_pdf)
+    resume_text = await resume_text_from_pdf(resume_pdf, pdf_hash)
+
+    return StreamingResponse(
+        _stream_grading(job, resume_text, resume_preview=resume_text[:800]),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Counted once the stream has been sent — rejected uploads never get here
+        background=BackgroundTask(analytics.record, "resume_analysis", request.client.host if request.client else None),
+    )
+
+
+# ---------------------------
+# Batch Endpoint
+# ---------------------------
+
+@app.post("/grade_resume_batch/")
+async def grade_resume_batch(
+    request: Request,
+    job_description: str | None = Form(None),
+    job_id: str | None = Form(None),
+    resume_pdfs: list[UploadFile] = File(default=[]),
+    resume_texts: list[str] = Form(default=[]),
+):
+    """
+    Grades many resumes (PDFs and/or pasted text) against one job description.
+    Streams one NDJSON line per resume as soon as it finishes — order is completion
+    order, so each line carries the resume's "index" (PDFs first, then texts).
+    A failing resume produces an "error" line instead of aborting the batch.
+    """
+    total = len(resume_pdfs) + len(resume_texts)
+    if total == 0:
+        raise HTTPException(status_code=400, detail="No resumes provided.")
+    if total > BATCH_MAX_RESUMES:
+        raise HTTPException(status_code=400, detail=f"Too many resumes. Maximum is {BATCH_MAX_RESUMES} per batch.")
+
+    await batch_rate_limiter.check_rate_limit(request, cost=total)
+
+    # The JD is the same for every resume — normalize and extract its skills once
+    # (already done at registration when a job_id is sent)
+    job = await resolve_job(job_description, job_id)
+
+    # Bounds this batch's share of the worker; PDF parsing and OpenAI calls
+    # are additionally capped globally by the process pool and LLM concurrency limit
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def _pdf_text(upload: UploadFile) -> str:
+        return await resume_text_from_pdf(upload, await read_pdf_upload(upload))
+
+    async def _pasted_text(text: str) -> str:
+        if len(text) > MAX_RESUME_TEXT_LENGTH:
+            raise HTTPException(status_code=400, detail="Resume text too long. Please submit a concise resume.")
+        return text
+
+    async def _grade_one(index: int, source: str, get_text) -> dict:
+        item = {"index": index, "source": source}
+        async with semaphore:
+            try:
+                resume_text = await get_text()
+                keyword_score = score_resume(resume_text, job.job_description, job_skills=job.skills)
+                item["evaluation"] = await get_or_grade(job, resume_text, keyword_score)
+                item["keyword_score"] = keyword_score
+            except HTTPException as e:
+                item["error"] = {"status": e.status_code, "detail": e.detail}
+            except Exception:
+                logger.exception("batch item %s failed", index)
+                item["error"] = {"status": 500, "detail": "Internal error."}
+        return item
+
+    items = [(upload.filename or f"pdf[{i}]", partial(_pdf_text, upload)) for i, upload in enumerate(resume_pdfs)]
+    items += [(f"text[{i}]", partial(_pasted_text, text)) for i, text in enumerate(resume_texts)]
+
+    async def _stream():
+        # Uploaded files stay open until the response has been fully sent,
+        # so they can be read lazily here
+        tasks = [
+            asyncio.ensure_future(_grade_one(index, source, get_text))
+            for index, (source, get_text) in enumerate(items)
+        ]
         try:
-            await redis.set(cache_key, json.dumps(evaluation), ex=86400)  # cache for 24 hours
-        except Exception:
-            pass
+            for next_done in asyncio.as_completed(tasks):
+                item = await next_done
+                yield dumps(item) + b"\n"
+        finally:
+            # Client disconnected — stop grading the rest
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(
+        _stream(),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(analytics.record, "batch_analysis", request.client.host if request.client else None),
+    )
 
-    # keyword_score runs locally (no API call) — counts matched/missing skills
-    keyword_score = score_resume(resume_text, job_description)
 
-    return {
-        "evaluation": evaluation,
-        "keyword_score": keyword_score,
-        "resume_preview": resume_text[:800],  # first 800 chars shown in UI as a preview
-    }
+@app.post("/rank_resumes/")
+async def rank_resumes_endpoint(http_request: Request, request: RankRequest):
+    """
+    Ranks an applicant pool against one job with the v2 IDF-weighted keyword
+    score — no OpenAI calls. Each entry has the keyword_score fields plus the
+    resume's "index" in the request, best match first.
+    """
+    if not request.resume_texts:
+        raise HTTPException(status_code=400, detail="No resumes provided.")
+    if len(request.resume_texts) > RANK_MAX_RESUMES:
+        raise HTTPException(status_code=400, detail=f"Too many resumes. Maximum is {RANK_MAX_RESUMES} per request.")
+    if any(len(text) > MAX_RESUME_TEXT_LENGTH for text in request.resume_texts):
+        raise HTTPException(status_code=400, detail="Resume text too long. Please submit a concise resume.")
+    if sum(len(text) for text in request.resume_texts) > RANK_MAX_TOTAL_CHARS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too much text. Maximum is {RANK_MAX_TOTAL_CHARS} characters per request; split the pool.",
+        )
+
+    await rate_limiter.check_rate_limit(http_request)
+
+    job = await resolve_job(request.job_description, request.job_id)
+
+    await job_idf.refresh()
+
+    # The thread doesn't free the interpreter (scoring holds the GIL); it only lets the
+    # event loop interleave. RANK_MAX_TOTAL_CHARS bounds how long that lasts.
+    ranking = await asyncio.to_thread(rank_resumes, request.resume_texts, job.job_description, idf=job_idf.weights())
+    if request.top_k is not None:
+        ranking = ranking[:max(request.top_k, 0)]
+
+    # Up to RANK_MAX_RESUMES entries — encoded in one call instead of FastAPI's per-field encoder
+    return FastJSONResponse({
+        "count": len(request.resume_texts),
+        "ranking": [{"index": index, **score} for index, score in ranking],
+    })
 
 
 # ---------------------------
 # Static files (must be last)
 # ---------------------------
 
-app.mount("/", StaticFiles(directory=FRONTEND_DIR), name="static")
+app.mount("/", static_assets, name="static")
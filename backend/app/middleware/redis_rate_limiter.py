@@ -1,22 +1,42 @@
 from fastapi import HTTPException, Request
 from redis.asyncio import Redis
-import os
+import time
 
+from ..services.metrics import RATE_LIMIT_REJECTIONS
+
+# Sliding-window counter over two fixed-window keys.
+# KEYS[1] = current window counter, KEYS[2] = previous window counter
+# ARGV = window_seconds, elapsed_ms into the current window, max_requests, cost
+# Returns {allowed, estimate} — estimate as a string so Lua doesn't truncate it.
 LUA_SCRIPT = """
-local current = redis.call('INCR', KEYS[1])
-if current == 1 then
-  redis.call('EXPIRE', KEYS[1], ARGV[1])
+local window = tonumber(ARGV[1])
+local weight = 1 - tonumber(ARGV[2]) / (window * 1000)
+local cost = tonumber(ARGV[4])
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local estimate = previous * weight + current
+if estimate + cost > tonumber(ARGV[3]) then
+  return {0, tostring(estimate)}
 end
-local ttl = redis.call('TTL', KEYS[1])
-return {current, ttl}
+current = redis.call('INCRBY', KEYS[1], cost)
+redis.call('EXPIRE', KEYS[1], window * 2)
+return {1, tostring(previous * weight + current)}
 """
 
 
 class RedisRateLimiter:
+    """
+    One atomic script call per check, so every worker and replica enforces the
+    same budget exactly. The previous window's count is weighted by how much of
+    it still overlaps the sliding window, so there is no burst at the boundary.
+    """
+
     def __init__(self, redis: Redis, max_requests: int, window_seconds: int):
         self.redis = redis
         self.max_requests = max_requests
         self.window_seconds = window_seconds
+        # register_script → EVALSHA, so the script body isn't resent on every call
+        self._script = redis.register_script(LUA_SCRIPT)
 
     def _get_ip(self, request: Request) -> str:
         xff = request.headers.get("x-forwarded-for")
@@ -24,29 +44,31 @@ class RedisRateLimiter:
             return xff.split(",")[0].strip()
         return request.client.host if request.client else "unknown"
 
-    async def check_rate_limit(self, request: Request):
+    async def check_rate_limit(self, request: Request, cost: int = 1, scope: str | None = None):
+        # cost > 1 charges several requests at once (e.g. one per resume in a batch).
+        # scope shares one budget between several routes; defaults to the request path.
         ip = self._get_ip(request)
-        key = f"rate_limit:{ip}:{request.url.path}"
+        key = f"rate_limit:{ip}:{scope or request.url.path}"
+
+        now = time.time()
+        window_index = int(now // self.window_seconds)
+        elapsed = now - window_index * self.window_seconds
 
         try:
-            current, ttl = await self.redis.eval(
-                LUA_SCRIPT,
-                1,
-                key,
-                str(self.window_seconds)
+            allowed, _ = await self._script(
+                keys=[f"{key}:{window_index}", f"{key}:{window_index - 1}"],
+                args=[self.window_seconds, int(elapsed * 1000), self.max_requests, cost],
             )
-
-            if int(current) > self.max_requests:
-                raise HTTPException(
-                    status_code=429,
-                    detail={
-                        "error": "Rate limit exceeded",
-                        "retry_after": max(int(ttl), 0)
-                    }
-                )
-
-        except HTTPException:
-            raise
         except Exception:
             # FAIL OPEN → Redis down should NOT crash API
             return
+
+        if not int(allowed):
+            RATE_LIMIT_REJECTIONS.inc((request.url.path, "redis"))
+            raise HTTPException(
+                status_code=429,
+                detail={
+                    "error": "Rate limit exceeded",
+                    "retry_after": int(self.window_seconds - elapsed) + 1
+                }
+            )
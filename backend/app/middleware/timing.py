@@ -0,0 +1,119 @@
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from ..services.metrics import REQUEST_SECONDS, RequestTimings, current_timings
+
+logger = logging.getLogger(__name__)
+
+# Add a Server-Timing header with the stage breakdown to every response
+SERVER_TIMING = os.getenv("SERVER_TIMING", "1") == "1"
+
+# Opt-in sampling profiler: profile PROFILE_SAMPLE_RATE of requests (one at a time)
+# and log where the event loop spent its time if the request took longer than
+# PROFILE_SLOW_REQUEST_MS. 0 disables.
+PROFILE_SLOW_REQUEST_MS = int(os.getenv("PROFILE_SLOW_REQUEST_MS", "0"))
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0.05"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+
+
+class StackSampler:
+    """
+    Statistical profiler: a background thread snapshots the event loop thread's
+    stack every interval and counts identical stacks. Nothing is installed in
+    the profiled thread, so overhead is one frame walk per interval.
+    Output is in collapsed-stack format ("a;b;c count"), ready for flamegraph tools.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+class TimingMiddleware:
+    """
+    Pure ASGI middleware (no response buffering, so streaming is unaffected):
+    - collects stage timings recorded with services.metrics.stage()
+    - records request latency per route
+    - adds the Server-Timing header
+    - optionally profiles a sample of requests and logs the slow ones
+    """
+
+    _profiling = False  # one profile at a time per process
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings(scope)
+        token = current_timings.set(timings)
+        start = time.perf_counter()
+        sampler = self._maybe_start_profiler()
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                elapsed = time.perf_counter() - start
+                REQUEST_SECONDS.observe(elapsed, (scope["method"], timings.route, str(message["status"])))
+                if SERVER_TIMING:
+                    entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.stages]
+                    entries.append(f"total;dur={elapsed * 1000:.1f}")
+                    message["headers"] = list(message.get("headers", [])) + [(b"server-timing", ", ".join(entries).encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            current_timings.reset(token)
+            if sampler is not None:
+                self._finish_profile(sampler, scope, timings, time.perf_counter() - start)
+
+    def _maybe_start_profiler(self) -> StackSampler | None:
+        if PROFILE_SLOW_REQUEST_MS <= 0 or TimingMiddleware._profiling or random.random() >= PROFILE_SAMPLE_RATE:
+            return None
+        TimingMiddleware._profiling = True
+        sampler = StackSampler(threading.get_ident(), PROFILE_INTERVAL_MS / 1000)
+        sampler.start()
+        return sampler
+
+    @staticmethod
+    def _finish_profile(sampler: StackSampler, scope, timings: RequestTimings, elapsed: float) -> None:
+        sampler.stop()
+        TimingMiddleware._profiling = False
+        if elapsed * 1000 < PROFILE_SLOW_REQUEST_MS:
+            return
+        # The loop serves other requests too, so these stacks are "what the worker was
+        # doing while this request was slow" — idle time shows up as the selector wait
+        top = "\n".join(f"{stack} {count}" for stack, count in sampler.samples.most_common(20))
+        stages = ", ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in timings.stages)
+        logger.warning(
+            "Slow request %s %s took %.0fms [%s]; top sampled stacks:\n%s",
+            scope["method"], scope["path"], elapsed * 1000, stages, top,
+        )
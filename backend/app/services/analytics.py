@@ -1,25 +1,147 @@
+import asyncio
 import hashlib
+import logging
 import os
+from collections import Counter
+from datetime import datetime, timezone
+from functools import lru_cache
 
+logger = logging.getLogger(__name__)
 
+# Flush buffered events after this many have been recorded, or this many seconds — whichever comes first
+ANALYTICS_FLUSH_SIZE = int(os.getenv("ANALYTICS_FLUSH_SIZE", "100"))
+ANALYTICS_FLUSH_INTERVAL = float(os.getenv("ANALYTICS_FLUSH_INTERVAL", "5"))
+
+# Each leaderboard keeps only this many users (see TRACK_USERS_SCRIPT)
+STATS_MAX_TRACKED_USERS = int(os.getenv("STATS_MAX_TRACKED_USERS", "10000"))
+
+STATS_WINDOWS = ("hour", "day", "all")
+
+# How long time-bucketed keys outlive their bucket
+_BUCKET_TTL = {"hour": 2 * 86400, "day": 35 * 86400}
+
+# Space-Saving top-K: once the set is full, a user not in it replaces the
+# smallest entry and inherits its count. Trimming the bottom instead would
+# evict every newcomer before it could grow, so the leaderboard would stop
+# admitting anyone new. Counts may be overestimated by at most the minimum.
+# KEYS[1] = users sorted set, ARGV = capacity, then ip_hash, count pairs
+TRACK_USERS_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+for i = 2, #ARGV, 2 do
+  local member, count = ARGV[i], tonumber(ARGV[i + 1])
+  if redis.call('ZSCORE', KEYS[1], member) or redis.call('ZCARD', KEYS[1]) < capacity then
+    redis.call('ZINCRBY', KEYS[1], count, member)
+  else
+    local smallest = redis.call('ZPOPMIN', KEYS[1])
+    redis.call('ZADD', KEYS[1], tonumber(smallest[2]) + count, member)
+  end
+end
+return 0
+"""
+
+
+def stats_keys(window: str, now: datetime | None = None) -> tuple[str, str, str]:
+    """
+    Redis keys (total counter, unique-visitor HyperLogLog, users sorted set) for a window.
+    - "hour": current UTC hour
+    - "day":  current UTC day
+    - "all":  since the beginning
+    """
+    if window == "all":
+        return "stats:total_requests", "stats:unique_ips", "stats:top_users"
+    now = now or datetime.now(timezone.utc)
+    bucket = now.strftime("%Y%m%d%H" if window == "hour" else "%Y%m%d")
+    return f"stats:{window}:{bucket}:total", f"stats:{window}:{bucket}:unique", f"stats:{window}:{bucket}:users"
+
+
+@lru_cache(maxsize=4096)
 def _hash_ip(ip: str) -> str:
     salt = os.getenv("IP_HASH_SALT", "")
     return hashlib.sha256(f"{salt}{ip}".encode()).hexdigest()[:16]
 
 
-async def log_event(event: str, ip: str | None, redis) -> None:
+class AnalyticsRecorder:
     """
     Track usage stats in Redis. Never stores raw IPs.
     - stats:total_requests     → total grader uses (int)
     - stats:unique_ips         → approximate unique visitors (HyperLogLog)
-    - stats:per_ip             → Hash of { ip_hash: count }
+    - stats:top_users          → Sorted set of { ip_hash: count }, top STATS_MAX_TRACKED_USERS (Space-Saving)
+    - the same three per hour and per day (see stats_keys), expiring on their own
+
+    Events are counted in memory and written in one pipeline per flush,
+    so a request costs no Redis round trips of its own.
     """
-    try:
-        ip_hash = _hash_ip(ip) if ip else "unknown"
-
-        await redis.incr("stats:total_requests")
-        await redis.pfadd("stats:unique_ips", ip_hash)
-        await redis.hincrby("stats:per_ip", ip_hash, 1)
-    except Exception:
-        # analytics must NEVER crash the app
-        return
+
+    def __init__(self, redis, flush_size: int = ANALYTICS_FLUSH_SIZE, flush_interval: float = ANALYTICS_FLUSH_INTERVAL):
+        self.redis = redis
+        self._track_users = redis.register_script(TRACK_USERS_SCRIPT)
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._total = 0
+        self._per_ip: Counter[str] = Counter()
+        self._flusher: asyncio.Task | None = None
+        self._pending_flush: asyncio.Task | None = None
+
+    def record(self, event: str, ip: str | None) -> None:
+        """Counts one event. Synchronous and never touches the network."""
+        self._total += 1
+        self._per_ip[_hash_ip(ip) if ip else "unknown"] += 1
+
+        if self._total >= self.flush_size and self._pending_flush is None:
+            try:
+                self._pending_flush = asyncio.get_running_loop().create_task(self.flush())
+                self._pending_flush.add_done_callback(self._flush_done)
+            except RuntimeError:
+                pass  # no event loop (e.g. called from a script) — the next timed flush picks it up
+
+    def _flush_done(self, task: asyncio.Task) -> None:
+        self._pending_flush = None
+
+    async def flush(self) -> None:
+        total, per_ip = self._total, self._per_ip
+        self._total, self._per_ip = 0, Counter()
+        if not total:
+            return
+
+        now = datetime.now(timezone.utc)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for window in STATS_WINDOWS:
+                    total_key, unique_key, users_key = stats_keys(window, now)
+                    pipe.incrby(total_key, total)
+                    pipe.pfadd(unique_key, *per_ip)
+                    await self._track_users(
+                        keys=[users_key],
+                        args=[STATS_MAX_TRACKED_USERS, *(item for pair in per_ip.items() for item in pair)],
+                        client=pipe,
+                    )
+                    if window in _BUCKET_TTL:
+                        for key in (total_key, unique_key, users_key):
+                            pipe.expire(key, _BUCKET_TTL[window])
+                await pipe.execute()
+        except Exception as e:
+            # analytics must NEVER crash the app — drop this batch rather than let the buffer grow
+            logger.warning("Dropped %d analytics events: %s", total, e)
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self) -> None:
+        """Starts the timed flush. Called from the app lifespan."""
+        if self._flusher is None:
+            self._flusher = asyncio.get_running_loop().create_task(self._flush_periodically())
+
+    async def stop(self) -> None:
+        """Stops the timed flush and writes whatever is still buffered."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        if self._pending_flush is not None:
+            await self._pending_flush
+        await self.flush()
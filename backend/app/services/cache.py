@@ -0,0 +1,149 @@
+import hashlib
+import os
+import re
+import time
+import zlib
+from collections import OrderedDict
+
+from redis.asyncio import Redis
+
+from .serialization import RawJSON, dumps, loads
+
+"""
+Two-tier cache shared by the grading endpoints.
+
+L1: bounded in-process LRU with a short TTL — hot keys never leave the worker
+L2: Redis, values stored as zlib-compressed compact JSON
+"""
+
+# LLM evaluations live in Redis for 24 hours
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "86400"))
+
+# Extracted resume text is kept for a week — candidates reuse one resume across many postings
+PDF_TEXT_CACHE_TTL = int(os.getenv("PDF_TEXT_CACHE_TTL", "604800"))
+
+# Per-worker L1 size (entries) and how long an entry may be served without checking Redis
+CACHE_LOCAL_SIZE = int(os.getenv("CACHE_LOCAL_SIZE", "1024"))
+CACHE_LOCAL_TTL = float(os.getenv("CACHE_LOCAL_TTL", "300"))
+
+
+def _collapse_whitespace(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def normalize_job_description(job_description: str) -> str:
+    return _collapse_whitespace(job_description).casefold()
+
+
+def llm_cache_key(job_description: str, resume_text: str, normalized_job: str | None = None) -> str:
+    """
+    Cache key for an LLM evaluation.
+    Whitespace is collapsed in both texts and the JD is case-folded, so the same
+    posting pasted with different line breaks or capitalisation still hits.
+    Pass normalized_job when grading many resumes against one JD.
+    """
+    if normalized_job is None:
+        normalized_job = normalize_job_description(job_description)
+    normalized = normalized_job + "||" + _collapse_whitespace(resume_text)
+    return "llm_cache:" + hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+
+
+def pdf_content_hash(pdf_bytes: bytes) -> str:
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+def pdf_content_hasher():
+    """Incremental version of pdf_content_hash — update() it with chunks as they are read."""
+    return hashlib.sha256()
+
+
+def encode_value(value) -> bytes:
+    return zlib.compress(dumps(value))
+
+
+def decode_value(data: bytes):
+    return loads(zlib.decompress(data))
+
+
+class TwoTierCache:
+    """
+    Values must be JSON-serialisable. L1 hands back the same object on every
+    hit, so callers must not mutate what they get.
+    With raw=True values are RawJSON: stored and returned as encoded bytes,
+    never parsed (same format in Redis, so entries are interchangeable).
+    Redis errors are swallowed — a broken cache only means more misses.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        prefix: str = "",
+        ttl: int = LLM_CACHE_TTL,
+        local_size: int = CACHE_LOCAL_SIZE,
+        local_ttl: float = CACHE_LOCAL_TTL,
+        raw: bool = False,
+    ):
+        self.redis = redis  # must be a bytes client (decode_responses=False)
+        self.raw = raw
+        self.prefix = prefix
+        self.ttl = ttl
+        self.local_size = local_size
+        self.local_ttl = local_ttl
+        self._local: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self.counters = {
+            "local_hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "bytes_read": 0,
+            "bytes_written": 0,
+        }
+
+    def _get_local(self, key: str):
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._local[key]
+            return None
+        self._local.move_to_end(key)
+        return value
+
+    def _set_local(self, key: str, value) -> None:
+        self._local[key] = (time.monotonic() + self.local_ttl, value)
+        self._local.move_to_end(key)
+        while len(self._local) > self.local_size:
+            self._local.popitem(last=False)
+
+    async def get(self, key: str):
+        value = self._get_local(key)
+        if value is not None:
+            self.counters["local_hits"] += 1
+            return value
+
+        try:
+            data = await self.redis.get(self.prefix + key)
+            if data is None:
+                self.counters["misses"] += 1
+                return None
+            value = RawJSON(zlib.decompress(data)) if self.raw else decode_value(data)
+        except Exception:
+            self.counters["misses"] += 1
+            return None  # Redis down or entry in an old format — treat as a miss
+
+        self.counters["redis_hits"] += 1
+        self.counters["bytes_read"] += len(data)
+        self._set_local(key, value)
+        return value
+
+    async def set(self, key: str, value) -> None:
+        self._set_local(key, value)
+        try:
+            data = zlib.compress(value.data) if self.raw else encode_value(value)
+            await self.redis.set(self.prefix + key, data, ex=self.ttl)
+            self.counters["bytes_written"] += len(data)
+        except Exception:
+            pass
+
+    def stats(self) -> dict:
+        return {**self.counters, "local_entries": len(self._local)}
@@ -0,0 +1,158 @@
+import math
+import os
+import re
+from collections import Counter
+
+"""
+Prompt compaction
+
+Shrinks resume and JD text before it goes into the prompt. LLM latency and
+cost scale with input tokens, and pypdf output is full of noise:
+- whitespace runs, page numbers, and headers/footers repeated on every page
+- sections that matter little for grading (references, hobbies, benefits...)
+
+Token counts are estimated locally — no tokenizer download, no network.
+"""
+
+RESUME_TOKEN_BUDGET = int(os.getenv("RESUME_TOKEN_BUDGET", "3000"))
+JOB_TOKEN_BUDGET = int(os.getenv("JOB_TOKEN_BUDGET", "1500"))
+
+# Per-worker totals so the saving can be measured: documents, tokens_before, tokens_after, truncated
+compaction_counters: Counter[str] = Counter()
+
+_PAGE_NUMBER = re.compile(r"^(page\s*)?\d{1,3}(\s*(of|/)\s*\d{1,3})?$", re.IGNORECASE)
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+# Section headings we recognise, in the order their content is least worth keeping.
+# Anything not listed is kept over these; they are dropped first when over budget.
+# (Languages and certifications are often JD requirements, so they aren't in here.)
+_LOW_PRIORITY_SECTIONS = (
+    "references", "hobbies", "interests", "equal opportunity", "perks", "benefits",
+    "about us", "volunteer", "awards", "publications",
+)
+_HEADING = re.compile(
+    r"^(summary|profile|objective|experience|work experience|professional experience|employment"
+    r"|education|skills|technical skills|projects|responsibilities|requirements|qualifications"
+    r"|languages|certifications|what you'll do|what we're looking for|nice to have|"
+    + "|".join(re.escape(s) for s in _LOW_PRIORITY_SECTIONS)
+    + r")\s*:?$",
+    re.IGNORECASE,
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough BPE token count: one token per word or symbol, plus one for every
+    further 6 characters of a long word. Close enough to budget with.
+    """
+    return sum(1 + (len(piece) - 1) // 6 for piece in _TOKEN.findall(text))
+
+
+# Page headers/footers are looked for among this many non-blank lines at each end of a page
+_PAGE_EDGE_LINES = 3
+
+
+def _page_edges(page: list[str]) -> dict[int, str]:
+    """{line index: "top" | "bottom"} for the first and last _PAGE_EDGE_LINES non-blank lines of a page."""
+    filled = [i for i, line in enumerate(page) if line]
+    edges = {i: "bottom" for i in filled[-_PAGE_EDGE_LINES:]}
+    edges.update({i: "top" for i in filled[:_PAGE_EDGE_LINES]})
+    return edges
+
+
+def _clean_lines(text: str) -> list[str]:
+    # Extracted PDFs separate pages with a form feed (see pdf_parser); pasted text is one page
+    pages = [
+        [line for line in (re.sub(r"\s+", " ", raw).strip() for raw in page.splitlines()) if not _PAGE_NUMBER.match(line)]
+        for page in text.split("\f")
+    ]
+
+    # Headers/footers (name, email, "Confidential"...) are lines at the top of two or more
+    # pages, or at the bottom of two or more — keep their first occurrence. Repeats
+    # elsewhere (a second "Software Engineer" role, the same bullet under two jobs) are
+    # content and stay. Section headings are exempt: a repeated "Experience" still
+    # starts a new section.
+    page_edges = [_page_edges(page) for page in pages]
+    edge_counts = Counter(
+        key for page, edges in zip(pages, page_edges)
+        for key in {(end, page[i].casefold()) for i, end in edges.items()}
+    )
+    seen: set[str] = set()
+    cleaned = []
+    for page, edges in zip(pages, page_edges):
+        for i, line in enumerate(page):
+            key = line.casefold()
+            if i in edges and edge_counts[edges[i], key] > 1 and len(key) >= 4 and not _HEADING.match(line):
+                if key in seen:
+                    continue
+                seen.add(key)
+            if line or (cleaned and cleaned[-1]):  # collapse blank-line runs
+                cleaned.append(line)
+    return cleaned
+
+
+def _split_sections(lines: list[str]) -> list[tuple[str, list[str]]]:
+    sections: list[tuple[str, list[str]]] = [("", [])]
+    for line in lines:
+        if _HEADING.match(line):
+            sections.append((line.rstrip(":").casefold(), [line]))
+        else:
+            sections[-1][1].append(line)
+    return [s for s in sections if s[1]]
+
+
+def _truncate(lines: list[str], token_budget: int) -> list[str]:
+    """Section-aware truncation: drop low-value sections, then trim the tail of each remaining one."""
+    sections = _split_sections(lines)
+    sizes = [estimate_tokens("\n".join(body)) for _, body in sections]
+
+    for name in reversed(_LOW_PRIORITY_SECTIONS):
+        if sum(sizes) <= token_budget:
+            break
+        for i, (heading, _) in enumerate(sections):
+            if heading == name:
+                sizes[i] = 0
+
+    total = sum(sizes)
+    kept = []
+    for (heading, body), size in zip(sections, sizes):
+        if size == 0:
+            continue
+        # Each surviving section keeps its share of the budget, counted from the top —
+        # the first lines of a section are usually the most recent/important.
+        # Its first two lines (heading + first entry) are always kept.
+        if total <= token_budget:
+            kept.extend(body)
+            continue
+        share = math.floor(token_budget * size / total)
+        used = 0
+        for n, line in enumerate(body):
+            cost = estimate_tokens(line)
+            if n >= 2 and used + cost > share:
+                break
+            kept.append(line)
+            used += cost
+    return kept
+
+
+def compact_text(text: str, token_budget: int) -> str:
+    before = estimate_tokens(text)
+    lines = _clean_lines(text)
+    compacted = "\n".join(lines).strip()
+
+    if estimate_tokens(compacted) > token_budget:
+        compacted = "\n".join(_truncate(lines, token_budget)).strip()
+        compaction_counters["truncated"] += 1
+
+    compaction_counters["documents"] += 1
+    compaction_counters["tokens_before"] += before
+    compaction_counters["tokens_after"] += estimate_tokens(compacted)
+    return compacted
+
+
+def compact_resume(resume_text: str) -> str:
+    return compact_text(resume_text, RESUME_TOKEN_BUDGET)
+
+
+def compact_job_description(job_description: str) -> str:
+    return compact_text(job_description, JOB_TOKEN_BUDGET)
@@ -0,0 +1,115 @@
+import asyncio
+import json
+import logging
+import os
+import time
+
+from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+# How long a flag value is trusted without re-reading Redis. Pub/sub normally
+# updates it much sooner; this only bounds staleness if a message is missed.
+FEATURE_FLAG_TTL = float(os.getenv("FEATURE_FLAG_TTL", "30"))
+
+FEATURE_FLAG_CHANNEL = "feature_flags"
+
+# How often the listener wakes up with no message to check whether it should stop
+FEATURE_FLAG_POLL_INTERVAL = 1.0
+
+# How long stop() waits for the listener to unsubscribe before abandoning it
+FEATURE_FLAG_STOP_TIMEOUT = 5.0
+
+
+class FeatureFlags:
+    """
+    Flag values cached in process memory.
+    - Reads hit Redis at most once per FEATURE_FLAG_TTL per flag
+    - set() writes Redis and publishes the change, and every replica's
+      listener applies it immediately
+    """
+
+    def __init__(self, redis: Redis, ttl: float = FEATURE_FLAG_TTL, channel: str = FEATURE_FLAG_CHANNEL):
+        self.redis = redis
+        self.ttl = ttl
+        self.channel = channel
+        self._values: dict[str, tuple[float, str | None]] = {}
+        self._listener: asyncio.Task | None = None
+        self._stopping = asyncio.Event()
+
+    async def get(self, key: str) -> str | None:
+        entry = self._values.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+
+        try:
+            value = await self.redis.get(key)
+        except Exception:
+            # Redis down — keep using the last known value (None if we never had one)
+            return entry[1] if entry is not None else None
+
+        self._remember(key, value)
+        return value
+
+    async def set(self, key: str, value: str) -> None:
+        """Persists the flag and tells every replica about it. Raises if Redis is down."""
+        await self.redis.set(key, value)
+        self._remember(key, value)
+        try:
+            await self.redis.publish(self.channel, json.dumps({"key": key, "value": value}))
+        except Exception:
+            logger.warning("Could not publish flag change for %s; replicas pick it up within %ss", key, self.ttl)
+
+    def _remember(self, key: str, value: str | None) -> None:
+        self._values[key] = (time.monotonic() + self.ttl, value)
+
+    async def _listen(self) -> None:
+        # Polls with a timeout instead of `async for ... in pubsub.listen()`: cancelling
+        # a task parked inside listen() can hang shutdown, so the loop exits on its own
+        # once _stopping is set.
+        while not self._stopping.is_set():
+            try:
+                pubsub = self.redis.pubsub()
+                await pubsub.subscribe(self.channel)
+                try:
+                    while not self._stopping.is_set():
+                        message = await pubsub.get_message(
+                            ignore_subscribe_messages=True, timeout=FEATURE_FLAG_POLL_INTERVAL
+                        )
+                        if message is None or message.get("type") != "message":
+                            continue
+                        change = json.loads(message["data"])
+                        self._remember(change["key"], change["value"])
+                finally:
+                    await pubsub.reset()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Lost the subscription — cached values may go stale, so re-read from Redis
+                logger.warning("Feature flag listener error: %s", e)
+                self._values.clear()
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=1)
+                except asyncio.TimeoutError:
+                    pass
+
+    def start(self) -> None:
+        """Starts listening for flag changes. Called from the app lifespan."""
+        if self._listener is None:
+            self._stopping.clear()
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+
+    async def stop(self) -> None:
+        """Asks the listener to finish; gives up after FEATURE_FLAG_STOP_TIMEOUT so shutdown never hangs."""
+        if self._listener is None:
+            return
+        listener, self._listener = self._listener, None
+        self._stopping.set()
+        try:
+            # shield: on timeout, wait_for must not wait on a cancel the listener may never finish
+            await asyncio.wait_for(asyncio.shield(listener), timeout=FEATURE_FLAG_STOP_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning("Feature flag listener did not stop within %ss; abandoning it", FEATURE_FLAG_STOP_TIMEOUT)
+            listener.cancel()
+        except Exception as e:
+            logger.warning("Feature flag listener failed while stopping: %s", e)
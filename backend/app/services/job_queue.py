@@ -0,0 +1,270 @@
+import asyncio
+import logging
+import os
+import secrets
+import time
+from typing import Awaitable, Callable
+
+from fastapi import HTTPException
+from redis.asyncio import Redis
+from redis.exceptions import ResponseError
+
+from .serialization import RawJSON, dumps
+
+"""
+Grading queue on a Redis Stream
+
+Submit/poll mode: the web process validates the request, adds it to the stream
+and answers with a task ID straight away. Worker processes (python -m app.worker)
+read the stream through a consumer group, do the PDF parse + grading, and store
+the result under the task ID for the client to poll.
+
+- Every entry is delivered to one consumer and stays pending until acked
+- A worker that dies mid-task leaves the entry pending; after
+  QUEUE_VISIBILITY_TIMEOUT another consumer claims it (XAUTOCLAIM). An entry
+  delivered more than QUEUE_MAX_ATTEMPTS times (e.g. a PDF that crashes the
+  worker every time) is failed instead of claimed again
+- Failed attempts are re-queued with a backoff, up to QUEUE_MAX_ATTEMPTS
+- Uploaded files are kept out of the stream: they are stored under a
+  short-lived key and only their size is queued
+"""
+
+QUEUE_STREAM = os.getenv("QUEUE_STREAM", "grading:queue")
+QUEUE_GROUP = "graders"
+
+# Concurrent consumers per worker process
+QUEUE_WORKERS = int(os.getenv("QUEUE_WORKERS", "4"))
+
+# Seconds a delivered task may run before it is cancelled and another consumer may take it over
+QUEUE_VISIBILITY_TIMEOUT = int(os.getenv("QUEUE_VISIBILITY_TIMEOUT", "120"))
+
+QUEUE_MAX_ATTEMPTS = int(os.getenv("QUEUE_MAX_ATTEMPTS", "3"))
+
+# How long task status and results can be polled
+QUEUE_RESULT_TTL = int(os.getenv("QUEUE_RESULT_TTL", "3600"))
+
+# Submissions are refused (503) while this many tasks are waiting
+QUEUE_MAX_LENGTH = int(os.getenv("QUEUE_MAX_LENGTH", "10000"))
+
+# Uploaded files waiting for a worker: how long they are kept, and how many
+# bytes may be waiting in total before uploads are refused (503)
+QUEUE_ATTACHMENT_TTL = int(os.getenv("QUEUE_ATTACHMENT_TTL", "900"))
+QUEUE_MAX_ATTACHMENT_BYTES = int(os.getenv("QUEUE_MAX_ATTACHMENT_BYTES", str(256 * 1024 * 1024)))
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[dict[str, bytes]], Awaitable[dict]]
+
+
+class GradingQueue:
+    """
+    Keys:
+    - <stream>                  → pending tasks (fields: task_id + the request payload)
+    - queue:task:<task id>      → hash: status, attempts, result / error
+    - queue:attachment:<id>     → uploaded file for the task, deleted once it is done or failed
+    - queue:attachment_bytes    → total size of the attachments waiting
+    """
+
+    ATTACHMENT_BYTES_KEY = "queue:attachment_bytes"
+
+    def __init__(
+        self,
+        redis: Redis,
+        stream: str = QUEUE_STREAM,
+        group: str = QUEUE_GROUP,
+        visibility_timeout: int = QUEUE_VISIBILITY_TIMEOUT,
+        max_attempts: int = QUEUE_MAX_ATTEMPTS,
+        result_ttl: int = QUEUE_RESULT_TTL,
+        max_length: int = QUEUE_MAX_LENGTH,
+        attachment_ttl: int = QUEUE_ATTACHMENT_TTL,
+        max_attachment_bytes: int = QUEUE_MAX_ATTACHMENT_BYTES,
+    ):
+        self.redis = redis  # bytes client — attachments are raw PDFs
+        self.stream = stream
+        self.group = group
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.result_ttl = result_ttl
+        self.max_length = max_length
+        self.attachment_ttl = attachment_ttl
+        self.max_attachment_bytes = max_attachment_bytes
+
+    @staticmethod
+    def _task_key(task_id: str) -> str:
+        return f"queue:task:{task_id}"
+
+    @staticmethod
+    def _attachment_key(task_id: str) -> str:
+        return f"queue:attachment:{task_id}"
+
+    async def submit(self, payload: dict[str, str], attachment: bytes | None = None) -> str:
+        """Queues a task. attachment (e.g. an uploaded PDF) is handed to the handler as payload["attachment"]."""
+        try:
+            if await self.redis.xlen(self.stream) >= self.max_length:
+                raise HTTPException(status_code=503, detail="Too many queued requests. Please try again later.")
+            if attachment is not None:
+                waiting = int(await self.redis.get(self.ATTACHMENT_BYTES_KEY) or 0)
+                if waiting + len(attachment) > self.max_attachment_bytes:
+                    raise HTTPException(status_code=503, detail="Too many uploads waiting to be graded. Please try again later.")
+
+            task_id = secrets.token_hex(12)
+            fields = {"task_id": task_id, **payload}
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.hset(self._task_key(task_id), mapping={"status": "queued", "attempts": 0})
+                pipe.expire(self._task_key(task_id), self.result_ttl)
+                if attachment is not None:
+                    pipe.set(self._attachment_key(task_id), attachment, ex=self.attachment_ttl)
+                    pipe.incrby(self.ATTACHMENT_BYTES_KEY, len(attachment))
+                    fields["attachment_size"] = len(attachment)
+                pipe.xadd(self.stream, fields)
+                await pipe.execute()
+        except HTTPException:
+            raise
+        except Exception:
+            # Unlike the caches, the queue can't fail open — there is nowhere else to put the task
+            raise HTTPException(status_code=503, detail="Queue unavailable. Please try again later.")
+        return task_id
+
+    async def status(self, task_id: str) -> dict | None:
+        try:
+            fields = await self.redis.hgetall(self._task_key(task_id))
+        except Exception:
+            raise HTTPException(status_code=503, detail="Queue unavailable. Please try again later.")
+        if not fields:
+            return None
+
+        fields = {k.decode(): v for k, v in fields.items()}
+        task = {"task_id": task_id, "status": fields["status"].decode(), "attempts": int(fields.get("attempts", 0))}
+        # Stored encoded — passed through to the response without parsing
+        if "result" in fields:
+            task["result"] = RawJSON(fields["result"])
+        if "error" in fields:
+            task["error"] = RawJSON(fields["error"])
+        return task
+
+    # ---------------------------
+    # Worker side
+    # ---------------------------
+
+    async def ensure_group(self) -> None:
+        try:
+            await self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def _reclaim(self, consumer: str) -> list:
+        """Takes over one task left pending longer than the visibility timeout (its worker died)."""
+        response = await self.redis.xautoclaim(
+            self.stream, self.group, consumer,
+            min_idle_time=self.visibility_timeout * 1000, start_id="0-0", count=1,
+        )
+        entries = [entry for entry in response[1] if entry[1]]
+        if not entries:
+            return []
+
+        entry_id, entry = entries[0]
+        pending = await self.redis.xpending_range(self.stream, self.group, min=entry_id, max=entry_id, count=1)
+        if pending and pending[0]["times_delivered"] > self.max_attempts:
+            # Every consumer that took it died — don't hand it to the next one
+            fields = {k.decode(): v for k, v in entry.items()}
+            task_id = fields["task_id"].decode()
+            logger.error("Grading task %s was delivered %d times without finishing; giving up", task_id, pending[0]["times_delivered"])
+            await self._finish(
+                entry_id, task_id, {"status": "failed", "error": dumps({"status": 500, "detail": "Grading failed."})},
+                attachment_size=int(fields["attachment_size"]) if "attachment_size" in fields else None,
+            )
+            return []
+        return entries
+
+    async def _read(self, consumer: str, block_ms: int) -> list:
+        response = await self.redis.xreadgroup(self.group, consumer, {self.stream: ">"}, count=1, block=block_ms)
+        if isinstance(response, dict):  # RESP3
+            response = list(response.items())
+        return [entry for _, entries in response or [] for entry in entries]
+
+    async def _finish(
+        self, entry_id, task_id: str, fields: dict, requeue: dict | None = None, attachment_size: int | None = None,
+    ) -> None:
+        """
+        Stores the outcome and removes the entry from the stream; optionally re-adds it for a retry.
+        The attachment is kept for the retry, otherwise deleted.
+        """
+        key = self._task_key(task_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping=fields)
+            if "error" not in fields:
+                pipe.hdel(key, "error")  # left over from a failed earlier attempt
+            pipe.expire(key, self.result_ttl)
+            pipe.xack(self.stream, self.group, entry_id)
+            pipe.xdel(self.stream, entry_id)
+            if requeue is not None:
+                pipe.xadd(self.stream, requeue)
+            elif attachment_size is not None:
+                pipe.delete(self._attachment_key(task_id))
+                pipe.decrby(self.ATTACHMENT_BYTES_KEY, attachment_size)
+            await pipe.execute()
+
+    async def _process(self, entry_id, entry: dict[bytes, bytes], handler: Handler) -> None:
+        payload = {k.decode(): v for k, v in entry.items()}
+        task_id = payload.pop("task_id").decode()
+        attachment_size = int(payload.pop("attachment_size")) if "attachment_size" in payload else None
+        key = self._task_key(task_id)
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hincrby(key, "attempts", 1)
+            pipe.hset(key, "status", "processing")
+            pipe.expire(key, self.result_ttl)
+            attempts, *_ = await pipe.execute()
+
+        # Handler, retry backoff and ack together must fit in the visibility timeout —
+        # after that another consumer may take the task over while this one still holds it
+        backoff = min(2 ** attempts, 30, self.visibility_timeout // 4) if attempts < self.max_attempts else 0
+
+        try:
+            if attachment_size is not None:
+                payload["attachment"] = await self.redis.get(self._attachment_key(task_id))
+                if payload["attachment"] is None:
+                    raise HTTPException(status_code=410, detail="Uploaded file expired. Please upload it again.")
+            # Less a moment for the ack itself
+            timeout = self.visibility_timeout - backoff - min(1, self.visibility_timeout / 10)
+            result = await asyncio.wait_for(handler(payload), timeout=timeout)
+        except HTTPException as e:
+            error = {"status": e.status_code, "detail": e.detail}
+            retryable = e.status_code >= 500
+        except asyncio.TimeoutError:
+            error = {"status": 504, "detail": "Grading took too long."}
+            retryable = True
+        except Exception:
+            logger.exception("Grading task %s failed", task_id)
+            error = {"status": 500, "detail": "Grading failed."}
+            retryable = True
+        else:
+            await self._finish(entry_id, task_id, {"status": "done", "result": dumps(result)}, attachment_size=attachment_size)
+            return
+
+        if retryable and attempts < self.max_attempts:
+            # Back off a little so a struggling upstream isn't hit again immediately
+            await asyncio.sleep(backoff)
+            await self._finish(entry_id, task_id, {"status": "queued", "error": dumps(error)}, requeue=entry)
+        else:
+            await self._finish(entry_id, task_id, {"status": "failed", "error": dumps(error)}, attachment_size=attachment_size)
+
+    async def consume(self, consumer: str, handler: Handler, stop: asyncio.Event, block_ms: int = 5000) -> None:
+        """Runs one consumer until stop is set. Each task is handled to completion before the next read."""
+        await self.ensure_group()
+        next_reclaim = 0.0
+        while not stop.is_set():
+            try:
+                entries = []
+                # Abandoned tasks are rare — only look for them every few seconds
+                if time.monotonic() >= next_reclaim:
+                    entries = await self._reclaim(consumer)
+                    next_reclaim = time.monotonic() + min(5, self.visibility_timeout)
+                if not entries:
+                    entries = await self._read(consumer, block_ms)
+                for entry_id, entry in entries:
+                    await self._process(entry_id, entry, handler)
+            except Exception:
+                logger.exception("Queue consumer %s error", consumer)
+                await asyncio.sleep(1)
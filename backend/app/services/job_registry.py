@@ -0,0 +1,77 @@
+import hashlib
+import os
+from dataclasses import dataclass
+
+from .cache import TwoTierCache, normalize_job_description
+from .compaction import compact_job_description
+from .resume_grader import build_job_messages
+from .scoring_engine import extract_job_skills
+
+"""
+Job registry
+
+A job description is posted once and referenced by ID afterwards. Everything
+derived from the JD alone (normalized text, skill set, prompt prefix) is
+computed at registration instead of on every grading request.
+"""
+
+# Registered jobs expire after 30 days without being re-registered
+JOB_TTL = int(os.getenv("JOB_TTL", str(30 * 86400)))
+
+
+@dataclass
+class Job:
+    job_description: str
+    normalized: str
+    skills: set[str]
+    messages: list[dict]  # system prompt + compacted JD — the stable prompt prefix
+    job_id: str | None = None
+
+    @property
+    def key(self) -> str:
+        """Stable ID derived from the normalized text — the same for registered and ad-hoc jobs."""
+        return hashlib.blake2b(self.normalized.encode(), digest_size=8).hexdigest()
+
+
+def prepare_job(job_description: str) -> Job:
+    """Does all per-JD work. Used directly for ad-hoc JDs and by the registry for stored ones."""
+    return Job(
+        job_description=job_description,
+        normalized=normalize_job_description(job_description),
+        skills=extract_job_skills(job_description),
+        messages=build_job_messages(compact_job_description(job_description)),
+    )
+
+
+class JobRegistry:
+    """
+    Stores prepared jobs in a TwoTierCache, so popular postings are served
+    from process memory. IDs are derived from the normalized JD, so posting
+    the same description twice returns the same ID.
+    """
+
+    def __init__(self, cache: TwoTierCache):
+        self.cache = cache
+
+    async def register(self, job_description: str) -> Job:
+        job = prepare_job(job_description)
+        job.job_id = job.key
+        await self.cache.set(job.job_id, {
+            "job_description": job.job_description,
+            "normalized": job.normalized,
+            "skills": sorted(job.skills),
+            "messages": job.messages,
+        })
+        return job
+
+    async def get(self, job_id: str) -> Job | None:
+        stored = await self.cache.get(job_id)
+        if stored is None:
+            return None
+        return Job(
+            job_description=stored["job_description"],
+            normalized=stored["normalized"],
+            skills=set(stored["skills"]),
+            messages=stored["messages"],
+            job_id=job_id,
+        )
@@ -1,38 +1,212 @@
+import asyncio
 import logging
 import os
+import time
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, AsyncIterator
 
 from fastapi import HTTPException
-from openai import OpenAI
+
+from .metrics import LLM_CALLS, record_usage
+from .resilience import AdaptiveLimiter, CircuitBreaker, backoff_delay
+
+if TYPE_CHECKING:
+    # The SDK takes ~0.5s to import — loaded on first use or by warm_up_llm()
+    from openai import AsyncOpenAI
 
 logger = logging.getLogger(__name__)
 
-# Singleton — created once at import time, reused for every request
-_client: OpenAI | None = None
+# Upper bound for OpenAI calls in flight per worker. The adaptive limiter
+# lowers the actual limit when OpenAI slows down; extra callers wait for a slot.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+
+# Total time budget per grading call, including waiting for a slot and retries
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+
+# Retries for transient errors (timeouts, connection errors, 429, 5xx), with jittered backoff
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+
+# Async singleton — one pooled HTTP client shared by every coroutine on the event loop
+_async_client: "AsyncOpenAI | None" = None
+_limiter: AdaptiveLimiter | None = None
+
+# Shared by all calls in this worker; main wires on_sustained_failure to the kill switch
+circuit_breaker = CircuitBreaker()
+
+
+def _get_async_client() -> "AsyncOpenAI":
+    global _async_client
+    if _async_client is None:
+        from openai import AsyncOpenAI
+
+        # SDK retries off — _with_retries does it within the LLM_TIMEOUT budget
+        _async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), timeout=LLM_TIMEOUT, max_retries=0)
+    return _async_client
+
+
+def _get_limiter() -> AdaptiveLimiter:
+    global _limiter
+    if _limiter is None:
+        _limiter = AdaptiveLimiter(LLM_MAX_CONCURRENCY)
+    return _limiter
+
+
+def warm_up_llm() -> None:
+    """Imports the SDK and builds the async client. Blocking — the lifespan runs it in a thread."""
+    _get_async_client()
+
+
+def _is_transient(e: BaseException) -> bool:
+    """Timeouts, connection errors, 429 and 5xx — worth retrying, and a sign OpenAI is struggling."""
+    import openai
+
+    return isinstance(e, (
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.RateLimitError,
+        openai.InternalServerError,
+    ))
+
+
+def llm_stats() -> dict:
+    return {
+        "circuit_breaker": circuit_breaker.stats(),
+        "concurrency": _get_limiter().stats(),
+    }
+
 
+async def close_async_client() -> None:
+    """Closes the pooled async client. Called from the app lifespan on shutdown."""
+    global _async_client, _limiter
+    if _async_client is not None:
+        await _async_client.close()
+    _async_client = None
+    _limiter = None
 
-def _get_client() -> OpenAI:
-    global _client
-    if _client is None:
-        _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), timeout=30)
-    return _client
 
+@asynccontextmanager
+async def _guarded(deadline: float):
+    """
+    One attempt at an OpenAI call: fails fast while the breaker is open, waits
+    for a concurrency slot (within the deadline), and reports the outcome to
+    the breaker and the limiter.
+    """
+    try:
+        circuit_breaker.check()
+    except HTTPException:
+        LLM_CALLS.inc(("breaker_open",))
+        raise
+    limiter = _get_limiter()
+    try:
+        await asyncio.wait_for(limiter.acquire(), timeout=max(deadline - time.monotonic(), 0))
+    except asyncio.TimeoutError:
+        circuit_breaker.release()
+        LLM_CALLS.inc(("no_slot",))
+        raise HTTPException(status_code=503, detail="AI service is busy. Please try again shortly.")
+
+    started = time.monotonic()
+    try:
+        yield
+    except BaseException as e:
+        transient = _is_transient(e)
+        await limiter.release(time.monotonic() - started, overloaded=transient)
+        if transient:
+            LLM_CALLS.inc(("transient_error",))
+            await circuit_breaker.record_failure()
+        else:
+            LLM_CALLS.inc(("error" if isinstance(e, Exception) else "cancelled",))
+            circuit_breaker.release()  # our error or a cancelled request — says nothing about OpenAI
+        raise
+    else:
+        await limiter.release(time.monotonic() - started)
+        LLM_CALLS.inc(("success",))
+        circuit_breaker.record_success()
+
+
+def _should_retry(e: Exception, attempt: int, deadline: float) -> float | None:
+    """Returns the backoff delay if another attempt fits in the budget, else None."""
+    if not _is_transient(e) or attempt >= LLM_MAX_RETRIES:
+        return None
+    delay = backoff_delay(attempt)
+    if time.monotonic() + delay >= deadline:
+        return None
+    logger.warning("OpenAI API error (attempt %d, retrying in %.2fs): %s", attempt + 1, delay, e)
+    return delay
 
-def call_chat_model(messages, model: str = "gpt-4.1-mini") -> str:
+
+async def call_chat_model_async(messages, model: str = "gpt-4.1-mini") -> str:
     """
-    Calls OpenAI Chat Completions and returns the assistant content.
-    Uses response_format=json_object for reliable JSON output.
+    Calls OpenAI Chat Completions (response_format=json_object) and returns the
+    assistant content. Awaits the completion without blocking the event loop,
+    so cache hits and /health keep being served meanwhile.
+    Guarded by the circuit breaker and adaptive concurrency limit; transient
+    errors are retried with jittered backoff, all within LLM_TIMEOUT.
     """
     if not os.getenv("OPENAI_API_KEY"):
         raise HTTPException(status_code=500, detail="OPENAI_API_KEY is not set")
 
-    try:
-        completion = _get_client().chat.completions.create(
-            model=model,
-            messages=messages,
-            response_format={"type": "json_object"},
-        )
-        return completion.choices[0].message.content
-
-    except Exception as e:
-        logger.error("OpenAI API error: %s", e)
-        raise HTTPException(status_code=502, detail="AI service error. Please try again.")
+    deadline = time.monotonic() + LLM_TIMEOUT
+    attempt = 0
+    while True:
+        try:
+            async with _guarded(deadline):
+                completion = await _get_async_client().chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    response_format={"type": "json_object"},
+                    timeout=max(deadline - time.monotonic(), 1),
+                )
+            record_usage(completion.usage)
+            return completion.choices[0].message.content
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            delay = _should_retry(e, attempt, deadline)
+            if delay is None:
+                logger.error("OpenAI API error: %s", e)
+                raise HTTPException(status_code=502, detail="AI service error. Please try again.")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+async def stream_chat_model(messages, model: str = "gpt-4.1-mini") -> AsyncIterator[str]:
+    """
+    Streaming version of call_chat_model_async: yields content chunks as
+    OpenAI produces them. Holds one concurrency slot until the stream ends.
+    Only retried if it fails before the first chunk was yielded.
+    """
+    if not os.getenv("OPENAI_API_KEY"):
+        raise HTTPException(status_code=500, detail="OPENAI_API_KEY is not set")
+
+    deadline = time.monotonic() + LLM_TIMEOUT
+    attempt = 0
+    while True:
+        started = False
+        try:
+            async with _guarded(deadline):
+                stream = await _get_async_client().chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    response_format={"type": "json_object"},
+                    stream=True,
+                    stream_options={"include_usage": True},  # usage arrives in a final chunk with no choices
+                    timeout=max(deadline - time.monotonic(), 1),
+                )
+                async for chunk in stream:
+                    if chunk.usage is not None:
+                        record_usage(chunk.usage)
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        started = True
+                        yield chunk.choices[0].delta.content
+            return
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            delay = None if started else _should_retry(e, attempt, deadline)
+            if delay is None:
+                logger.error("OpenAI API error: %s", e)
+                raise HTTPException(status_code=502, detail="AI service error. Please try again.")
+            await asyncio.sleep(delay)
+            attempt += 1
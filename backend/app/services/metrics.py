@@ -0,0 +1,193 @@
+import contextvars
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Iterable
+
+"""
+Metrics
+
+Small in-process counters and histograms, rendered in the Prometheus text
+format on /metrics. Recording is a dict lookup plus a bisect — cheap enough
+for every stage of every request.
+
+Values are per worker process, like the counters in /stats; Prometheus
+adds them up across targets.
+"""
+
+# Seconds. Covers cache hits (sub-millisecond) through slow OpenAI calls.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()  # sync endpoints run in the threadpool
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        # labels → [per-bucket counts (last = +Inf), sum]
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: tuple = ()) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {total!r}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list = []
+        self._collectors: list[Callable[[], Iterable[str]]] = []
+
+    def counter(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[str]]) -> None:
+        """For values kept elsewhere (cache stats, tier counters): rendered on every scrape."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+def gauge_lines(name: str, help: str, values: dict[tuple, float], labelnames: tuple[str, ...] = (), kind: str = "gauge"):
+    """Renders a set of values computed at scrape time (kind: "gauge" or "counter")."""
+    yield f"# HELP {name} {help}"
+    yield f"# TYPE {name} {kind}"
+    for labels, value in sorted(values.items()):
+        yield f"{name}{_labels(labelnames, labels)} {_number(value)}"
+
+
+registry = Registry()
+
+REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds", "Request latency until the response started.", ("method", "route", "status"),
+)
+STAGE_SECONDS = registry.histogram(
+    "grading_stage_duration_seconds", "Time spent in each stage of a grading request.", ("route", "stage"),
+)
+RATE_LIMIT_REJECTIONS = registry.counter(
+    "rate_limit_rejections_total", "Requests rejected with 429.", ("path", "tier"),
+)
+LLM_TOKENS = registry.counter(
+    "llm_tokens_total", "Tokens reported in OpenAI usage (cached = prompt tokens served from the prompt cache).", ("type",),
+)
+LLM_CALLS = registry.counter(
+    "llm_calls_total", "OpenAI call attempts by outcome.", ("outcome",),
+)
+
+
+# ---------------------------
+# Per-request stage timings
+# ---------------------------
+
+class RequestTimings:
+    __slots__ = ("scope", "stages")
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.stages: list[tuple[str, float]] = []
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or "unmatched"
+
+
+current_timings: contextvars.ContextVar[RequestTimings | None] = contextvars.ContextVar("current_timings", default=None)
+
+
+def record_stage(name: str, seconds: float) -> None:
+    timings = current_timings.get()
+    STAGE_SECONDS.observe(seconds, (timings.route if timings else "none", name))
+    if timings is not None:
+        timings.stages.append((name, seconds))
+
+
+@contextmanager
+def stage(name: str):
+    """Times a block as one stage of the current request: histogram + Server-Timing entry."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+
+def record_usage(usage) -> None:
+    """Counts tokens from a completion's `usage` (absent on some responses)."""
+    if usage is None:
+        return
+    LLM_TOKENS.inc(("prompt",), getattr(usage, "prompt_tokens", 0) or 0)
+    LLM_TOKENS.inc(("completion",), getattr(usage, "completion_tokens", 0) or 0)
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", 0) if details is not None else 0
+    if cached:
+        LLM_TOKENS.inc(("cached",), cached)
@@ -1,29 +1,223 @@
-from pypdf import PdfReader
 from io import BytesIO
+from typing import BinaryIO
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from fastapi import HTTPException
+import asyncio
+import logging
+import os
 
+logger = logging.getLogger(__name__)
 
-def extract_text_from_pdf_bytes(pdf_bytes: bytes) -> str:
+
+def _available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not on macOS/Windows
+        return os.cpu_count() or 1
+
+
+# Number of worker processes used for text extraction. pypdf is pure Python and
+# holds the GIL, so separate processes are the only way to parse PDFs in parallel.
+# Set to 0 to extract in a thread instead (e.g. where subprocesses aren't allowed).
+# Capped by default: the CPU count doesn't reflect a container's CPU quota.
+PDF_POOL_SIZE = int(os.getenv("PDF_POOL_SIZE", str(min(_available_cpus(), 4))))
+
+# Give up on a single document after this many seconds of parsing
+PDF_EXTRACT_TIMEOUT = float(os.getenv("PDF_EXTRACT_TIMEOUT", "10"))
+
+# How long an upload may wait for a free worker before it gets a 503
+PDF_QUEUE_TIMEOUT = float(os.getenv("PDF_QUEUE_TIMEOUT", "10"))
+
+
+# Between the text of consecutive pages. A form feed is whitespace to every
+# regex and splitlines(), so scoring treats it like a line break.
+PAGE_SEPARATOR = "\f"
+
+
+class PDFExtractionError(Exception):
+    """Raised by the extraction worker. Plain Exception so it pickles across processes."""
+
+
+def _import_pypdf() -> None:
+    """Worker initializer: pays the pypdf import when a process starts, not on its first document."""
+    import pypdf  # noqa: F401
+
+
+class _Worker:
+    """One extraction process. A running call can't be cancelled, so an overrunning worker is killed and replaced."""
+
+    def __init__(self):
+        self.executor = ProcessPoolExecutor(max_workers=1, initializer=_import_pypdf)
+
+    def kill(self) -> None:
+        # ProcessPoolExecutor has no public way to stop a running call
+        for process in list((self.executor._processes or {}).values()):
+            process.kill()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class _WorkerPool:
     """
-    Extracts text from a PDF file given its raw bytes.
-    Raises HTTPException if extraction fails or produces no text.
+    PDF_POOL_SIZE single-process workers. Each document checks a worker out,
+    so queue wait (bounded by PDF_QUEUE_TIMEOUT, 503) is kept apart from parse
+    time (bounded by PDF_EXTRACT_TIMEOUT, 400).
+    """
+
+    def __init__(self, size: int):
+        self.loop = asyncio.get_running_loop()
+        self.workers = {_Worker() for _ in range(size)}
+        self._idle: asyncio.Queue[_Worker] = asyncio.Queue()
+        for worker in self.workers:
+            self._idle.put_nowait(worker)
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        worker.kill()
+        self.workers.discard(worker)
+        replacement = _Worker()
+        self.workers.add(replacement)
+        return replacement
+
+    async def run(self, fn, *args):
+        try:
+            worker = await asyncio.wait_for(self._idle.get(), timeout=PDF_QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=503, detail="Too many PDFs are being processed. Please try again shortly.")
+
+        try:
+            for attempt in range(2):
+                future = worker.executor.submit(fn, *args)
+                try:
+                    return await asyncio.wait_for(asyncio.wrap_future(future), timeout=PDF_EXTRACT_TIMEOUT)
+                except BrokenProcessPool:
+                    # The process died (OOM killer, SIGKILL): start a new one and retry once
+                    logger.warning("PDF worker died; replacing it")
+                    worker = self._replace(worker)
+                    if attempt:
+                        raise HTTPException(status_code=503, detail="PDF processing is unavailable. Please try again.")
+                finally:
+                    # Timed out or the request was cancelled: the process is still parsing
+                    if not future.done():
+                        worker = self._replace(worker)
+        finally:
+            if worker in self.workers:
+                self._idle.put_nowait(worker)
+
+    def shutdown(self) -> None:
+        for worker in self.workers:
+            worker.kill()
+        self.workers.clear()
+
+
+_pool: _WorkerPool | None = None
+
+
+def _get_pool() -> _WorkerPool:
+    global _pool
+    if _pool is None or _pool.loop is not asyncio.get_running_loop():
+        shutdown_pdf_pool()
+        _pool = _WorkerPool(PDF_POOL_SIZE)
+    return _pool
+
+
+async def warm_up_pdf_pool() -> None:
+    """
+    Starts the extraction processes ahead of the first upload. Called from the
+    app lifespan; without it the first PDF waits for the pool to fork and import pypdf.
+    """
+    if PDF_POOL_SIZE <= 0:
+        await asyncio.to_thread(_import_pypdf)
+        return
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+    await asyncio.gather(*(loop.run_in_executor(worker.executor, _import_pypdf) for worker in pool.workers))
+
+
+def shutdown_pdf_pool() -> None:
+    """Stops the extraction worker processes. Called from the app lifespan on shutdown."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+    _pool = None
+
+
+def _extract_text(pdf: bytes | BinaryIO, max_chars: int | None = None) -> str:
     """
+    Runs pypdf over the document page by page. Takes raw bytes or a seekable file.
+    Pages are separated by PAGE_SEPARATOR, so compaction can tell page headers/footers apart.
+    Stops early once the text is already longer than max_chars — the caller
+    will reject it anyway, so there is no point parsing the remaining pages.
+    """
+    from pypdf import PdfReader
+
     try:
-        reader = PdfReader(BytesIO(pdf_bytes))
+        reader = PdfReader(BytesIO(pdf) if isinstance(pdf, bytes) else pdf)
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Invalid PDF file: {e}")
+        raise PDFExtractionError(f"Invalid PDF file: {e}")
 
     pages_text = []
+    total_chars = 0
     for page in reader.pages:
         page_text = page.extract_text() or ""
         pages_text.append(page_text)
+        total_chars += len(page_text) + 1
+        # Cheap running total first; only build the string once we might be over
+        if max_chars is not None and total_chars > max_chars:
+            if len(PAGE_SEPARATOR.join(pages_text).strip()) > max_chars:
+                break
 
-    final_text = "\n".join(pages_text).strip()
+    final_text = PAGE_SEPARATOR.join(pages_text).strip()
 
     if not final_text:
-        raise HTTPException(
-            status_code=400,
-            detail="PDF uploaded but no text could be extracted."
-        )
+        raise PDFExtractionError("PDF uploaded but no text could be extracted.")
 
     return final_text
+
+
+def extract_text_from_pdf_bytes(pdf_bytes: bytes, max_chars: int | None = None) -> str:
+    """
+    Extracts text from a PDF file given its raw bytes.
+    Raises HTTPException if extraction fails or produces no text.
+    """
+    try:
+        return _extract_text(pdf_bytes, max_chars)
+    except PDFExtractionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def extract_text_from_pdf_bytes_async(pdf_bytes: bytes, max_chars: int | None = None) -> str:
+    """
+    Same as extract_text_from_pdf_bytes, but runs in the worker process pool
+    so the event loop stays free while pypdf parses the document.
+    """
+    try:
+        if PDF_POOL_SIZE > 0:
+            return await _get_pool().run(_extract_text, pdf_bytes, max_chars)
+        # Thread mode: a thread can't be stopped, so this only stops waiting for it
+        return await asyncio.wait_for(asyncio.to_thread(_extract_text, pdf_bytes, max_chars), timeout=PDF_EXTRACT_TIMEOUT)
+    except PDFExtractionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=400, detail="PDF took too long to process.")
+
+
+async def extract_text_from_pdf_file_async(pdf_file: BinaryIO, max_chars: int | None = None) -> str:
+    """
+    Same as extract_text_from_pdf_bytes_async, for a seekable file (e.g. an upload's spooled file).
+    In thread mode pypdf reads the file directly; a worker process needs the bytes,
+    so the file is read into one buffer just before it is handed over.
+    """
+    pdf_file.seek(0)
+    if PDF_POOL_SIZE > 0:
+        pdf_bytes = await asyncio.to_thread(pdf_file.read)
+        return await extract_text_from_pdf_bytes_async(pdf_bytes, max_chars)
+
+    try:
+        return await asyncio.wait_for(
+            asyncio.to_thread(_extract_text, pdf_file, max_chars),
+            timeout=PDF_EXTRACT_TIMEOUT,
+        )
+    except PDFExtractionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=400, detail="PDF took too long to process.")
@@ -0,0 +1,60 @@
+import os
+from collections import Counter
+
+"""
+Keyword pre-screen
+
+First tier of the grading cascade. When the deterministic keyword score shows
+an obvious mismatch, a local evaluation is returned instead of calling OpenAI.
+"""
+
+# Resumes scoring below this keyword match (0-100) skip the LLM. 0 disables the pre-screen.
+PRESCREEN_THRESHOLD = int(os.getenv("PRESCREEN_THRESHOLD", "10"))
+
+# Only trust the keyword score when the JD names at least this many known skills
+PRESCREEN_MIN_JOB_SKILLS = int(os.getenv("PRESCREEN_MIN_JOB_SKILLS", "5"))
+
+# Per-worker counters for tuning the threshold:
+# - tier counts: "prescreen", "cache", "approximate", "llm"
+# - "llm_by_keyword_decile:<d>" / "llm_score_sum_by_keyword_decile:<d>": how the
+#   LLM actually scored resumes in each keyword-score decile
+tier_counters: Counter[str] = Counter()
+
+
+def should_prescreen(keyword_score: dict) -> bool:
+    job_skill_count = len(keyword_score["matched_skills"]) + len(keyword_score["missing_skills"])
+    return (
+        job_skill_count >= PRESCREEN_MIN_JOB_SKILLS
+        and keyword_score["overall_score"] < PRESCREEN_THRESHOLD
+    )
+
+
+def record_llm_result(keyword_score: dict, match_score: int) -> None:
+    decile = min(keyword_score["overall_score"] // 10, 9)
+    tier_counters[f"llm_by_keyword_decile:{decile}"] += 1
+    tier_counters[f"llm_score_sum_by_keyword_decile:{decile}"] += match_score
+
+
+def prescreen_evaluation(keyword_score: dict) -> dict:
+    """Builds an evaluation in the same schema as SYSTEM_PROMPT from the keyword score alone."""
+    matched = keyword_score["matched_skills"]
+    missing = keyword_score["missing_skills"]
+    total = len(matched) + len(missing)
+
+    strengths = [f"Mentions {skill}, which the job asks for." for skill in matched[:5]]
+    if not strengths:
+        strengths = ["No overlap with the skills listed in the job description was found."]
+
+    return {
+        "match_score": keyword_score["overall_score"],
+        "summary": (
+            f"Quick keyword pre-screen: the resume covers {len(matched)} of the {total} skills "
+            "named in the job description, so a detailed AI review was skipped."
+        ),
+        "strengths": strengths,
+        "gaps": [f"No mention of {skill}." for skill in missing[:5]],
+        "improvements": [
+            f"If you have experience with {skill}, say so explicitly in your resume." for skill in missing[:5]
+        ],
+        "prescreen": True,
+    }
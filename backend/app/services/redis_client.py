@@ -2,6 +2,7 @@ import os
 from redis.asyncio import Redis
 
 _redis = None
+_redis_bytes = None
 
 
 def get_redis() -> Redis:
@@ -14,5 +15,16 @@ def get_redis() -> Redis:
     return _redis
 
 
+def get_redis_bytes() -> Redis:
+    """Same server, but returns raw bytes — needed for compressed cache values."""
+    global _redis_bytes
+    if _redis_bytes is None:
+        _redis_bytes = Redis.from_url(
+            os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+            decode_responses=False
+        )
+    return _redis_bytes
+
+
 # this file is for any direct redis interactions we want to do outside of the rate limiter,
 # like caching llm responses, or storing analytics data, etc.
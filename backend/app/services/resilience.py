@@ -0,0 +1,214 @@
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable
+
+from fastapi import HTTPException
+
+"""
+Resilience primitives for the OpenAI client
+
+- CircuitBreaker: stops calling a failing upstream for a while, so requests
+  fail in milliseconds instead of each waiting for its own timeout
+- AdaptiveLimiter: AIMD concurrency limit — grows slowly while latency is
+  normal, shrinks quickly when calls slow down or fail
+- backoff_delay: full-jitter exponential backoff between retries
+"""
+
+# Breaker: open when at least LLM_BREAKER_MIN_CALLS calls in the last LLM_BREAKER_WINDOW
+# seconds were made and LLM_BREAKER_FAILURE_RATIO of them failed. Stay open for
+# LLM_BREAKER_OPEN_SECONDS, then let one probe call through.
+LLM_BREAKER_WINDOW = int(os.getenv("LLM_BREAKER_WINDOW", "30"))
+LLM_BREAKER_MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS", "10"))
+LLM_BREAKER_FAILURE_RATIO = float(os.getenv("LLM_BREAKER_FAILURE_RATIO", "0.5"))
+LLM_BREAKER_OPEN_SECONDS = float(os.getenv("LLM_BREAKER_OPEN_SECONDS", "15"))
+
+# After this many openings in a row (every probe failed), call on_sustained_failure —
+# the app uses it to flip the AI kill switch. 0 disables.
+LLM_BREAKER_KILLSWITCH_TRIPS = int(os.getenv("LLM_BREAKER_KILLSWITCH_TRIPS", "3"))
+
+# Adaptive limiter: a call slower than LLM_LATENCY_TOLERANCE x the usual latency counts as overload
+LLM_MIN_CONCURRENCY = int(os.getenv("LLM_MIN_CONCURRENCY", "2"))
+LLM_LATENCY_TOLERANCE = float(os.getenv("LLM_LATENCY_TOLERANCE", "2.0"))
+
+
+class CircuitBreaker:
+    """
+    closed → open: failure ratio over the rolling window reached the threshold
+    open → half-open: open_seconds passed; a single probe call is allowed
+    half-open → closed on probe success, → open again on probe failure
+    """
+
+    def __init__(
+        self,
+        window_seconds: int = LLM_BREAKER_WINDOW,
+        min_calls: int = LLM_BREAKER_MIN_CALLS,
+        failure_ratio: float = LLM_BREAKER_FAILURE_RATIO,
+        open_seconds: float = LLM_BREAKER_OPEN_SECONDS,
+        sustained_trips: int = LLM_BREAKER_KILLSWITCH_TRIPS,
+    ):
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.open_seconds = open_seconds
+        self.sustained_trips = sustained_trips
+        self.on_sustained_failure: Callable[[], Awaitable[None]] | None = None
+
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.trips = 0  # consecutive openings without a successful call in between (or since on_sustained_failure)
+        self._probe_in_flight = False
+        # One [second, calls, failures] bucket per second of the rolling window
+        self._buckets: deque[list[int]] = deque()
+
+    def _bucket(self, now: float) -> list[int]:
+        second = int(now)
+        while self._buckets and self._buckets[0][0] <= second - self.window_seconds:
+            self._buckets.popleft()
+        if not self._buckets or self._buckets[-1][0] != second:
+            self._buckets.append([second, 0, 0])
+        return self._buckets[-1]
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls are being rejected outright (not yet due for a probe)."""
+        return self.state == "open" and time.monotonic() - self.opened_at < self.open_seconds
+
+    def retry_after(self) -> int:
+        return max(1, int(self.open_seconds - (time.monotonic() - self.opened_at)) + 1)
+
+    def check(self) -> None:
+        """Raises 503 if no call may be made right now."""
+        if self.state == "open":
+            if self.is_open:
+                raise HTTPException(
+                    status_code=503,
+                    detail="AI service is temporarily unavailable. Please try again shortly.",
+                    headers={"Retry-After": str(self.retry_after())},
+                )
+            self.state = "half_open"
+
+        if self.state == "half_open":
+            if self._probe_in_flight:
+                raise HTTPException(
+                    status_code=503,
+                    detail="AI service is temporarily unavailable. Please try again shortly.",
+                    headers={"Retry-After": "1"},
+                )
+            self._probe_in_flight = True
+
+    def release(self) -> None:
+        """The call ended without telling us anything about upstream health (e.g. a bad request)."""
+        self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        self._bucket(time.monotonic())[1] += 1
+        if self.state == "half_open":
+            self.state = "closed"
+            self._buckets.clear()
+        self._probe_in_flight = False
+        self.trips = 0
+
+    async def record_failure(self) -> None:
+        now = time.monotonic()
+        bucket = self._bucket(now)
+        bucket[1] += 1
+        bucket[2] += 1
+        self._probe_in_flight = False
+
+        if self.state == "half_open":
+            self._open(now)
+        elif self.state == "closed":
+            calls = sum(b[1] for b in self._buckets)
+            failures = sum(b[2] for b in self._buckets)
+            if calls >= self.min_calls and failures >= calls * self.failure_ratio:
+                self._open(now)
+            else:
+                return
+        else:
+            return
+
+        if self.trips >= self.sustained_trips and self.on_sustained_failure is not None:
+            # Start counting again, so it fires again if the outage outlasts a manual re-enable
+            self.trips = 0
+            await self.on_sustained_failure()
+
+    def _open(self, now: float) -> None:
+        self.state = "open"
+        self.opened_at = now
+        self.trips += 1
+
+    def stats(self) -> dict:
+        return {
+            "state": "open" if self.is_open else ("closed" if self.state == "closed" else "half_open"),
+            "consecutive_trips": self.trips,
+            "window_calls": sum(b[1] for b in self._buckets),
+            "window_failures": sum(b[2] for b in self._buckets),
+        }
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit.
+    - each normal call adds 1/limit (about +1 per round of `limit` calls)
+    - a failure, or a call slower than tolerance x the usual latency, multiplies
+      the limit by `backoff` — at most once per usual-latency interval, so one
+      slow burst doesn't collapse it to the minimum
+    Callers over the limit wait for a slot.
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        min_limit: int = LLM_MIN_CONCURRENCY,
+        tolerance: float = LLM_LATENCY_TOLERANCE,
+        backoff: float = 0.9,
+    ):
+        self.max_limit = max_limit
+        self.min_limit = min(min_limit, max_limit)
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self.baseline: float | None = None  # EWMA of call latency, seconds
+        self._last_decrease = 0.0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, latency: float, overloaded: bool = False) -> None:
+        async with self._cond:
+            self.in_flight -= 1
+            self._adjust(latency, overloaded)
+            self._cond.notify(max(int(self.limit) - self.in_flight, 0))
+
+    def _adjust(self, latency: float, overloaded: bool) -> None:
+        slow = self.baseline is not None and latency > self.baseline * self.tolerance
+        if overloaded or slow:
+            now = time.monotonic()
+            if now - self._last_decrease >= (self.baseline or 1.0):
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._last_decrease = now
+        else:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+        if not overloaded:
+            # Slow EWMA, so a genuinely slower model raises the baseline over time
+            self.baseline = latency if self.baseline is None else 0.98 * self.baseline + 0.02 * latency
+
+    def stats(self) -> dict:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "baseline_latency": round(self.baseline, 3) if self.baseline is not None else None,
+        }
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 4.0) -> float:
+    """Full jitter: uniform in [0, min(cap, base * 2^attempt)], so retries from many callers spread out."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
@@ -1,6 +1,16 @@
-import json
+import logging
+import math
 from fastapi import HTTPException
-from .llm import call_chat_model
+from pydantic import BaseModel, ValidationError, field_validator
+from pydantic_core import to_json
+from typing import AsyncIterator
+from .llm import call_chat_model_async, stream_chat_model
+from .serialization import RawJSON, loads
+
+logger = logging.getLogger(__name__)
+
+# Bullet lists are asked for with 3-5 items; anything far beyond that is the model rambling
+MAX_LIST_ITEMS = 10
 
 SYSTEM_PROMPT = (
     "You are an expert recruiter and resume reviewer.\n"
@@ -16,21 +26,129 @@ SYSTEM_PROMPT = (
 )
 
 
-def grade_resume_against_job(job_description: str, resume_text: str) -> dict:
-    messages = [
+def build_job_messages(job_description: str) -> list[dict]:
+    """
+    The part of the prompt that depends only on the JD. It comes first and is
+    identical for every resume graded against the same job, so the provider can
+    reuse its prompt cache for this prefix.
+    """
+    return [
         {"role": "system", "content": SYSTEM_PROMPT},
-        {
-            "role": "user",
-            "content": f"JOB DESCRIPTION:\n{job_description}\n\nRESUME:\n{resume_text}",
-        },
+        {"role": "user", "content": f"JOB DESCRIPTION:\n{job_description}"},
     ]
 
-    raw = call_chat_model(messages)
 
+def _build_messages(job_description: str, resume_text: str, job_messages: list[dict] | None = None) -> list[dict]:
+    if job_messages is None:
+        job_messages = build_job_messages(job_description)
+    return job_messages + [{"role": "user", "content": f"RESUME:\n{resume_text}"}]
+
+
+class Evaluation(BaseModel):
+    """
+    The SYSTEM_PROMPT schema. Validators repair what the model commonly gets
+    slightly wrong (score as "85%" or 85.5, a bullet list sent as one string,
+    null for an empty list); anything else fails validation.
+    Unknown keys are dropped.
+    """
+
+    match_score: int
+    summary: str = ""
+    strengths: list[str] = []
+    gaps: list[str] = []
+    improvements: list[str] = []
+
+    @field_validator("match_score", mode="before")
+    @classmethod
+    def _score(cls, value):
+        if isinstance(value, str):
+            value = value.strip().rstrip("%").strip()
+            try:
+                value = float(value)
+            except ValueError:
+                raise ValueError("match_score is not a number")
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            raise ValueError("match_score is not a number")
+        return min(max(int(round(value)), 0), 100)
+
+    @field_validator("summary", mode="before")
+    @classmethod
+    def _summary(cls, value):
+        if value is None:
+            return ""
+        if isinstance(value, list):
+            return " ".join(str(item).strip() for item in value if item is not None)
+        return str(value).strip()
+
+    @field_validator("strengths", "gaps", "improvements", mode="before")
+    @classmethod
+    def _bullets(cls, value):
+        if value is None:
+            return []
+        if isinstance(value, str):
+            value = [value]
+        if not isinstance(value, list):
+            raise ValueError("expected a list of strings")
+        items = [str(item).strip() for item in value if isinstance(item, (str, int, float))]
+        return [item for item in items if item][:MAX_LIST_ITEMS]
+
+    def to_json(self) -> RawJSON:
+        """Encoded once (in Rust, by pydantic-core); cached and returned as these bytes."""
+        return RawJSON(to_json(self))
+
+
+def _load_json_object(raw: str):
+    try:
+        return loads(raw)
+    except ValueError:
+        pass
+    # JSON mode makes this rare, but a model can still wrap the object in prose or ``` fences
+    start, end = raw.find("{"), raw.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        return loads(raw[start:end + 1])
+    except ValueError:
+        return None
+
+
+def parse_evaluation(raw: str) -> Evaluation:
+    """
+    Parses and validates the model's output in one pass. Output that can't be
+    repaired is rejected with a 502 here — the same as any other upstream
+    failure, so it is retried by the queue and never cached.
+    """
+    data = _load_json_object(raw)
+    if not isinstance(data, dict):
+        logger.warning("Model returned invalid JSON: %.200r", raw)
+        raise HTTPException(status_code=502, detail="AI service returned an invalid evaluation. Please try again.")
     try:
-        return json.loads(raw)
-    except json.JSONDecodeError:
-        raise HTTPException(
-            status_code=500,
-            detail="Model returned invalid JSON"
-        )
+        return Evaluation.model_validate(data)
+    except ValidationError as e:
+        logger.warning("Model output failed validation: %s", e.errors(include_url=False, include_input=False, include_context=False))
+        raise HTTPException(status_code=502, detail="AI service returned an invalid evaluation. Please try again.")
+
+
+async def grade_resume_against_job_async(
+    job_description: str,
+    resume_text: str,
+    job_messages: list[dict] | None = None,
+) -> Evaluation:
+    """
+    Grades the resume against the job, awaiting OpenAI without blocking the event loop.
+    Pass job_messages (from build_job_messages) to reuse a prebuilt JD prefix.
+    """
+    raw = await call_chat_model_async(_build_messages(job_description, resume_text, job_messages))
+    return parse_evaluation(raw)
+
+
+def stream_grade_resume_against_job(
+    job_description: str,
+    resume_text: str,
+    job_messages: list[dict] | None = None,
+) -> AsyncIterator[str]:
+    """
+    Yields the raw JSON evaluation in chunks as the model writes it.
+    Join the chunks and pass them to parse_evaluation once the stream ends.
+    """
+    return stream_chat_model(_build_messages(job_description, resume_text, job_messages))
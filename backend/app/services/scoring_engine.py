@@ -1,4 +1,11 @@
+import math
 import re
+from collections import Counter
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    # Only the v2 scorers need NumPy; they import it on first use (see warm_up_scoring)
+    import numpy as np
 
 
 """
@@ -47,27 +54,119 @@ def _normalize(text: str):
     return text
 
 
+def _build_trie_pattern(words) -> str:
+    """
+    Turns a list of phrases into one regex shaped like a trie, e.g.
+    {"git", "github", "gitlab"} -> "git(?:hub|lab)?".
+    The regex engine then walks shared prefixes once instead of trying every
+    phrase separately, so matching cost stays flat as the skills list grows.
+    """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}  # end-of-phrase marker
+
+    def _emit(node: dict) -> str:
+        is_end = "" in node
+        branches = [re.escape(ch) + _emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not is_end:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if is_end else group
+
+    return _emit(trie)
+
+
+def _build_skill_matcher(skills):
+    """
+    Compiles every skill into a single pattern that finds all of them in one pass.
+    - Same boundaries as matching each skill with \\b...\\b on its own (so "c++"
+      only counts when a letter or digit follows, as it always has)
+    - The lookahead makes matches zero-width, so overlapping skills that start
+      at different positions are all found
+    """
+    pattern = r"\b(?=(" + _build_trie_pattern(skills) + r")\b)"
+    return re.compile(pattern)
+
+
+def _build_implied_skills(skills) -> dict[str, set[str]]:
+    """
+    The matcher reports only the longest skill starting at each position, so
+    map each skill to the shorter skills it contains with a \\b after them
+    (e.g. "power bi" -> {"power"} if "power" were also a skill).
+    """
+    implied = {}
+    for skill in skills:
+        prefixes = {
+            other for other in skills
+            if other != skill
+            and skill.startswith(other)
+            and bool(re.match(r"\w", other[-1])) != bool(re.match(r"\w", skill[len(other)]))
+        }
+        if prefixes:
+            implied[skill] = prefixes
+    return implied
+
+
+# Built once on first use (or by warm_up_scoring) and shared by every request
+_skill_matcher: re.Pattern | None = None
+_implied_skills: dict[str, set[str]] | None = None
+
+
+def _get_skill_matcher() -> tuple[re.Pattern, dict[str, set[str]]]:
+    global _skill_matcher, _implied_skills
+    if _skill_matcher is None:
+        _implied_skills = _build_implied_skills(COMMON_SKILLS)
+        _skill_matcher = _build_skill_matcher(COMMON_SKILLS)
+    return _skill_matcher, _implied_skills
+
+
+def warm_up_scoring() -> None:
+    """Compiles the skill matcher and loads NumPy. Called from the app lifespan."""
+    import numpy  # noqa: F401
+
+    _get_skill_matcher()
+
+
 def _extract_skills(text: str):
     """
     Very simple v1 extractor:
     - Finds skills based on a known skills list
     - Later we’ll replace/improve this with NLP + embeddings
     """
+    matcher, implied_skills = _get_skill_matcher()
     normalized = _normalize(text)
-    found = set()
+    found = {match.group(1) for match in matcher.finditer(normalized)}
 
-    for skill in COMMON_SKILLS:
-        # match whole words/phrases safely
-        pattern = r"\b" + re.escape(skill) + r"\b"
-        if re.search(pattern, normalized):
-            found.add(skill)
+    for skill in list(found):
+        found.update(implied_skills.get(skill, ()))
 
     return found
 
 
-def score_resume(resume_text, job_text):
+def _count_skills(text: str) -> Counter:
+    """Like _extract_skills, but counts how often each skill is mentioned."""
+    matcher, implied_skills = _get_skill_matcher()
+    counts = Counter(match.group(1) for match in matcher.finditer(_normalize(text)))
+    for skill, n in list(counts.items()):
+        for implied in implied_skills.get(skill, ()):
+            counts[implied] += n
+    return counts
+
+
+def extract_job_skills(job_text: str) -> set[str]:
+    """Skills in a job description — compute once when scoring many resumes against it."""
+    return _extract_skills(job_text)
+
+
+def score_resume(resume_text, job_text, job_skills: set[str] | None = None):
     resume_skills = _extract_skills(resume_text)
-    job_skills = _extract_skills(job_text)
+    if job_skills is None:
+        job_skills = _extract_skills(job_text)
 
     matched = sorted(resume_skills.intersection(job_skills))
     missing = sorted(job_skills.difference(resume_skills))
@@ -88,3 +187,97 @@ def score_resume(resume_text, job_text):
         "missing_skills": missing,
         "notes": "v1 keyword-based scoring (deterministic)."
     }
+
+
+# ---------------------------
+# v2: IDF-weighted vector scoring
+# ---------------------------
+#
+# Every skill has a fixed column in VOCABULARY, so a document becomes a NumPy
+# vector and many resumes become one matrix. A JD's skills are weighted by how
+# often it mentions them and by how rare they are across the job descriptions
+# seen so far (IDF, see skill_idf.py) — "kubernetes" in a posting says more than "git" does.
+# Scoring a resume = the share of that weight it covers; scoring thousands of
+# resumes against one JD is a single matrix-vector product.
+
+VOCABULARY: tuple[str, ...] = tuple(sorted(COMMON_SKILLS))
+_SKILL_INDEX = {skill: i for i, skill in enumerate(VOCABULARY)}
+
+
+def skill_vector(text: str) -> "np.ndarray":
+    """Sublinear term frequency (1 + log count) per vocabulary skill, 0 when absent."""
+    import numpy as np
+
+    vector = np.zeros(len(VOCABULARY), dtype=np.float32)
+    for skill, count in _count_skills(text).items():
+        vector[_SKILL_INDEX[skill]] = 1 + math.log(count)
+    return vector
+
+
+def skill_matrix(texts: list[str]) -> "np.ndarray":
+    """One row per document, shape (len(texts), len(VOCABULARY))."""
+    import numpy as np
+
+    matrix = np.zeros((len(texts), len(VOCABULARY)), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for skill, count in _count_skills(text).items():
+            matrix[row, _SKILL_INDEX[skill]] = 1 + math.log(count)
+    return matrix
+
+
+def score_matrix(resume_matrix: "np.ndarray", job_vector: "np.ndarray", idf: "np.ndarray | None" = None) -> "np.ndarray":
+    """
+    0-100 score for every row of resume_matrix: the IDF-weighted share of the
+    JD's skills the resume mentions. One vectorized pass over all resumes.
+    Without idf every skill weighs the same.
+    """
+    import numpy as np
+
+    weights = job_vector if idf is None else job_vector * idf
+    total = weights.sum()
+    if total == 0:
+        return np.zeros(len(resume_matrix), dtype=np.float32)
+    return (resume_matrix > 0).astype(np.float32) @ weights * (100 / total)
+
+
+def _v2_result(score: float, present: "np.ndarray", job_mask: "np.ndarray") -> dict:
+    import numpy as np
+
+    skills_score = int(round(float(score)))
+    return {
+        "overall_score": skills_score,
+        "skills_match": skills_score,
+        # VOCABULARY is sorted, so index order is alphabetical like v1
+        "matched_skills": [VOCABULARY[i] for i in np.flatnonzero(present & job_mask)],
+        "missing_skills": [VOCABULARY[i] for i in np.flatnonzero(~present & job_mask)],
+        "notes": "v2 IDF-weighted skill scoring (deterministic).",
+    }
+
+
+def score_resumes_v2(
+    resume_texts: list[str], job_text: str, job_vector: "np.ndarray | None" = None, idf: "np.ndarray | None" = None,
+) -> list[dict]:
+    """Scores many resumes against one JD. Same fields as score_resume, in input order."""
+    if job_vector is None:
+        job_vector = skill_vector(job_text)
+    resume_matrix = skill_matrix(resume_texts)
+    scores = score_matrix(resume_matrix, job_vector, idf)
+
+    present = resume_matrix > 0
+    job_mask = job_vector > 0
+    return [_v2_result(scores[i], present[i], job_mask) for i in range(len(resume_texts))]
+
+
+def score_resume_v2(
+    resume_text: str, job_text: str, job_vector: "np.ndarray | None" = None, idf: "np.ndarray | None" = None,
+) -> dict:
+    return score_resumes_v2([resume_text], job_text, job_vector, idf)[0]
+
+
+def rank_resumes(
+    resume_texts: list[str], job_text: str, job_vector: "np.ndarray | None" = None, idf: "np.ndarray | None" = None,
+) -> list[tuple[int, dict]]:
+    """(input index, score) pairs, best match first. Ties keep input order."""
+    results = score_resumes_v2(resume_texts, job_text, job_vector, idf)
+    order = sorted(range(len(results)), key=lambda i: -results[i]["overall_score"])
+    return [(i, results[i]) for i in order]
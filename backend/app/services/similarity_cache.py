@@ -0,0 +1,118 @@
+import hashlib
+import os
+import re
+from array import array
+
+from redis.asyncio import Redis
+
+"""
+Near-duplicate index for cached evaluations.
+
+The exact cache misses when a candidate fixes a typo or re-exports the PDF.
+This index stores a MinHash fingerprint of every graded resume, per job, and
+finds cached evaluations of resumes that are almost the same.
+
+- Fingerprint: one-permutation MinHash over word 3-gram shingles. Each shingle
+  is hashed once and lands in one of NUM_BINS bins; a bin keeps its minimum.
+  Matching bins / NUM_BINS estimates the Jaccard similarity of the two texts.
+- Lookup: banded LSH. The fingerprint is cut into BANDS bands and each band is
+  a Redis set key listing the entries that share it. A lookup reads only those
+  BANDS sets, so its cost does not depend on how many entries are indexed.
+"""
+
+# Minimum estimated similarity (0-1) to reuse another resume's evaluation. 1 disables the index.
+SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.9"))
+
+NUM_BINS = 64
+BANDS = 16  # 16 bands x 4 rows: pairs at 0.9 similarity share a band >99.9% of the time, at 0.5 about 65%
+ROWS = NUM_BINS // BANDS
+_EMPTY = (1 << 64) - 1
+
+_WORD = re.compile(r"[a-z0-9+#]+")
+
+
+def fingerprint(text: str) -> array:
+    words = _WORD.findall(text.lower())
+    shingles = {" ".join(words[i:i + 3]) for i in range(max(len(words) - 2, 1))}
+
+    bins = array("Q", [_EMPTY]) * NUM_BINS
+    for shingle in shingles:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "little")
+        b = h % NUM_BINS
+        if h < bins[b]:
+            bins[b] = h
+
+    # Densify: an empty bin borrows the next non-empty one, so short texts still compare sensibly
+    filled = [i for i in range(NUM_BINS) if bins[i] != _EMPTY]
+    if filled:
+        for i in range(NUM_BINS):
+            if bins[i] == _EMPTY:
+                source = next((j for j in filled if j > i), filled[0])
+                bins[i] = bins[source]
+    return bins
+
+
+def similarity(a: array, b: array) -> float:
+    return sum(x == y for x, y in zip(a, b)) / NUM_BINS
+
+
+class SimilarityIndex:
+    """
+    Keys (all expire with the cached evaluations they point to):
+    - simcache:sig:<cache key>                  → packed fingerprint
+    - simcache:band:<job>:<band>:<band hash>    → set of cache keys
+    """
+
+    def __init__(self, redis: Redis, ttl: int, threshold: float = SIMILARITY_THRESHOLD):
+        self.redis = redis  # bytes client
+        self.ttl = ttl
+        self.threshold = threshold
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold < 1
+
+    @staticmethod
+    def _band_keys(job_key: str, sig: array) -> list[str]:
+        raw = sig.tobytes()
+        width = ROWS * sig.itemsize
+        return [
+            f"simcache:band:{job_key}:{band}:{hashlib.blake2b(raw[band * width:(band + 1) * width], digest_size=8).hexdigest()}"
+            for band in range(BANDS)
+        ]
+
+    async def lookup(self, job_key: str, sig: array) -> tuple[str, float] | None:
+        """Returns (cache key, similarity) of the most similar indexed resume above the threshold."""
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key in self._band_keys(job_key, sig):
+                    pipe.smembers(key)
+                buckets = await pipe.execute()
+
+            candidates = sorted({member.decode() for bucket in buckets for member in bucket})
+            if not candidates:
+                return None
+
+            stored = await self.redis.mget([f"simcache:sig:{c}" for c in candidates])
+        except Exception:
+            return None
+
+        best = None
+        for candidate, packed in zip(candidates, stored):
+            if packed is None:
+                continue
+            score = similarity(sig, array("Q", packed))
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (candidate, score)
+        return best
+
+    async def add(self, job_key: str, cache_key: str, sig: array) -> None:
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.set(f"simcache:sig:{cache_key}", sig.tobytes(), ex=self.ttl)
+                for key in self._band_keys(job_key, sig):
+                    pipe.sadd(key, cache_key)
+                    pipe.expire(key, self.ttl)
+                await pipe.execute()
+        except Exception:
+            pass
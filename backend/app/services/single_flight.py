@@ -0,0 +1,99 @@
+import asyncio
+import logging
+import uuid
+from typing import Awaitable, Callable
+
+from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+# Deletes the lock only if we still own it, so a slow leader can't release
+# a lock that already expired and was taken by another replica
+RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    """
+    Collapses identical concurrent work into one call.
+    - Same process: every caller with the same key awaits one shared task
+    - Across replicas: a short Redis lock picks one leader; the others poll
+      the cache until the leader's result shows up
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        lock_ttl: int = 35,
+        wait_timeout: float = 35.0,
+        poll_interval: float = 0.1,
+    ):
+        self.redis = redis
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._release = redis.register_script(RELEASE_LUA)
+
+    async def run(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable],
+        load: Callable[[], Awaitable],
+    ):
+        """
+        Returns compute()'s result, running it at most once per key at a time.
+        load() should return the cached result written by compute(), or None.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run_across_replicas(key, compute, load))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        # shield() so one caller disconnecting doesn't cancel the work for everyone else
+        return await asyncio.shield(task)
+
+    def _done(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark as retrieved even if every caller went away
+
+    async def _run_across_replicas(self, key, compute, load):
+        lock_key = f"lock:{key}"
+        token = uuid.uuid4().hex
+
+        try:
+            acquired = await self.redis.set(lock_key, token, nx=True, ex=self.lock_ttl)
+        except Exception:
+            return await compute()  # Redis down — no cross-replica dedup, just do the work
+
+        if acquired:
+            try:
+                return await compute()
+            finally:
+                try:
+                    await self._release(keys=[lock_key], args=[token])
+                except Exception:
+                    pass  # lock expires on its own
+
+        # Another replica is already computing this — wait for its result
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.wait_timeout
+        try:
+            while loop.time() < deadline:
+                await asyncio.sleep(self.poll_interval)
+                result = await load()
+                if result is not None:
+                    return result
+                if not await self.redis.exists(lock_key):
+                    break  # leader finished without caching (e.g. it failed)
+        except Exception:
+            pass
+
+        logger.info("single-flight wait for %s gave up, computing locally", key)
+        return await compute()
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Iterable
+
+from redis.asyncio import Redis
+
+from .scoring_engine import VOCABULARY, _SKILL_INDEX
+
+if TYPE_CHECKING:
+    import numpy as np
+
+"""
+Skill IDF for v2 ranking, shared by every process.
+
+Document frequencies live in Redis, so all web workers rank an applicant pool
+with the same weights and nothing resets on a restart. A job description is
+counted once per IDF_SEEN_TTL, however many workers and requests see it.
+New JDs are queued in memory and sent in one pipeline every IDF_FLUSH_INTERVAL
+seconds, so observing one costs a request no round trip.
+"""
+
+logger = logging.getLogger(__name__)
+
+# A JD seen again after this long counts again (it is evidently still being posted)
+IDF_SEEN_TTL = int(os.getenv("IDF_SEEN_TTL", str(30 * 86400)))
+
+# Seconds between writes of newly seen JDs to Redis
+IDF_FLUSH_INTERVAL = float(os.getenv("IDF_FLUSH_INTERVAL", "5"))
+
+# Counts the JD only if its key is new.
+# KEYS[1] = seen marker, KEYS[2] = doc-frequency hash, KEYS[3] = doc counter
+# ARGV = seen TTL, then the JD's skills
+OBSERVE_SCRIPT = """
+if not redis.call('SET', KEYS[1], 1, 'NX', 'EX', ARGV[1]) then
+  return 0
+end
+redis.call('INCR', KEYS[3])
+for i = 2, #ARGV do
+  redis.call('HINCRBY', KEYS[2], ARGV[i], 1)
+end
+return 1
+"""
+
+
+class SkillIDF:
+    """
+    Keys:
+    - idf:seen:<job key>  → marker: this JD is already counted
+    - idf:doc_freq        → hash: { skill: number of JDs mentioning it }
+    - idf:doc_count       → number of JDs counted
+
+    Starts uniform (all weights 1) and sharpens as postings come in. Each
+    process remembers the most recent max_tracked JD keys it has queued, so a
+    popular posting is only sent once. Redis being down leaves the last
+    loaded weights in place, and queued JDs wait for the next flush.
+    """
+
+    FREQ_KEY = "idf:doc_freq"
+    COUNT_KEY = "idf:doc_count"
+
+    def __init__(
+        self,
+        redis: Redis,
+        seen_ttl: int = IDF_SEEN_TTL,
+        flush_interval: float = IDF_FLUSH_INTERVAL,
+        max_tracked: int = 10000,
+    ):
+        self.redis = redis
+        self.seen_ttl = seen_ttl
+        self.flush_interval = flush_interval
+        self.max_tracked = max_tracked
+        self._observe = redis.register_script(OBSERVE_SCRIPT)
+        self._seen: OrderedDict[str, None] = OrderedDict()
+        self._pending: dict[str, list[str]] = {}  # JD key -> skills, not yet sent
+        self._weights: "np.ndarray | None" = None
+        self._flusher: asyncio.Task | None = None
+
+    def observe(self, key: str, skills: Iterable[str]) -> None:
+        """Queues a JD (its already-extracted skills) to be counted. Synchronous and never touches the network."""
+        if key in self._seen:
+            self._seen.move_to_end(key)
+            return
+        self._seen[key] = None
+        if len(self._seen) > self.max_tracked:
+            self._seen.popitem(last=False)
+        self._pending[key] = sorted(skills)
+
+    async def flush(self) -> None:
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key, skills in pending.items():
+                    await self._observe(
+                        keys=[f"idf:seen:{key}", self.FREQ_KEY, self.COUNT_KEY],
+                        args=[self.seen_ttl, *skills],
+                        client=pipe,
+                    )
+                await pipe.execute()
+        except Exception as e:
+            # Retried on the next flush — the seen markers make a partly applied batch safe to resend
+            logger.warning("Could not record %d job descriptions for the skill IDF: %s", len(pending), e)
+            for key, skills in pending.items():
+                if len(self._pending) >= self.max_tracked:
+                    break
+                self._pending.setdefault(key, skills)
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self) -> None:
+        """Starts the timed flush. Called from the app lifespan."""
+        if self._flusher is None:
+            self._flusher = asyncio.get_running_loop().create_task(self._flush_periodically())
+
+    async def stop(self) -> None:
+        """Stops the timed flush and sends whatever is still queued."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+
+    async def refresh(self) -> None:
+        """Loads the shared counts. One round trip; called before each ranking."""
+        import numpy as np
+
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.get(self.COUNT_KEY)
+                pipe.hgetall(self.FREQ_KEY)
+                doc_count, freq = await pipe.execute()
+        except Exception:
+            return
+        if not doc_count:
+            self._weights = None
+            return
+
+        doc_freq = np.zeros(len(VOCABULARY), dtype=np.float32)
+        for skill, count in freq.items():
+            skill = skill.decode() if isinstance(skill, bytes) else skill
+            if skill in _SKILL_INDEX:
+                doc_freq[_SKILL_INDEX[skill]] = int(count)
+        # Smoothed IDF: never zero, and a skill no JD mentioned yet gets the highest weight
+        self._weights = (np.log((1 + int(doc_count)) / (1 + doc_freq)) + 1).astype(np.float32)
+
+    def weights(self) -> "np.ndarray":
+        """As of the last refresh()."""
+        import numpy as np
+
+        if self._weights is None:
+            return np.ones(len(VOCABULARY), dtype=np.float32)
+        return self._weights
@@ -0,0 +1,206 @@
+import gzip
+import hashlib
+import mimetypes
+import re
+import threading
+from pathlib import Path, PurePosixPath
+
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+
+try:
+    import brotli
+except ImportError:  # optional — gzip only without it
+    brotli = None
+
+"""
+Static assets
+
+The frontend is small, so it is loaded into memory once and every response
+is a dict lookup:
+- each file gets a content fingerprint; HTML and CSS references to other
+  assets are rewritten to fingerprinted URLs (style.css -> /style.<hash>.css)
+- fingerprinted URLs are cached by browsers for a year ("immutable"); plain
+  URLs and pages are revalidated with a strong ETag and answered with 304
+- text assets are precompressed with brotli (if installed) and gzip and
+  picked by Accept-Encoding
+"""
+
+# Fingerprinted URLs never change content — a new deploy produces new URLs
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Pages and plain URLs: always revalidate (a 304 is cheap)
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+_COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+# href="..." / src="..." in HTML, url(...) in CSS. Absolute URLs, anchors and
+# data: URIs don't resolve to an asset path and are left alone.
+_HTML_REFERENCE = re.compile(r"""(?P<prefix>\b(?:href|src)=)(?P<quote>["'])(?P<url>[^"'#?]+)(?P=quote)""")
+_CSS_REFERENCE = re.compile(r"""(?P<prefix>url\()(?P<quote>["']?)(?P<url>[^"')#?]+)(?P=quote)""")
+
+
+class Asset:
+    __slots__ = ("content_type", "url", "variants")
+
+    def __init__(self, body: bytes, content_type: str, digest: str, url: str):
+        self.content_type = content_type
+        self.url = url  # fingerprinted URL
+        # encoding -> (body, ETag). Each representation needs its own strong ETag.
+        self.variants: dict[str, tuple[bytes, str]] = {"identity": (body, f'"{digest}"')}
+        if content_type.startswith(_COMPRESSIBLE_TYPES):
+            if brotli is not None:
+                self._add_variant("br", brotli.compress(body, quality=11), digest)
+            self._add_variant("gzip", gzip.compress(body, compresslevel=9, mtime=0), digest)
+
+    def _add_variant(self, encoding: str, compressed: bytes, digest: str) -> None:
+        # Not worth a Vary-split cache entry unless it actually saves bytes
+        if len(compressed) < len(self.variants["identity"][0]) * 0.9:
+            self.variants[encoding] = (compressed, f'"{digest}-{encoding}"')
+
+
+def _accepted_encodings(header: str) -> dict[str, float]:
+    """Parses Accept-Encoding into {encoding: q}."""
+    accepted = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        match = re.search(r"q\s*=\s*([0-9.]+)", params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def _choose_encoding(asset: Asset, header: str) -> str:
+    """Highest q wins, ties go to the smallest body; identity if nothing else is accepted."""
+    accepted = _accepted_encodings(header)
+
+    def _q(name: str) -> float:
+        return accepted.get(name, accepted.get("*", 0.0))
+
+    candidates = [name for name in asset.variants if _q(name) > 0]
+    if not candidates:
+        return "identity"
+    return max(candidates, key=lambda name: (_q(name), -len(asset.variants[name][0])))
+
+
+def _fingerprinted(path: str, digest: str) -> str:
+    """images/logo.jpg -> images/logo.<digest>.jpg"""
+    posix = PurePosixPath(path)
+    return str(posix.with_name(f"{posix.stem}.{digest[:12]}{posix.suffix}"))
+
+
+class StaticAssets:
+    """
+    In-memory frontend. Mounted as an ASGI app at "/" (for assets) and used by
+    the page routes via response(). Files are read on first use or by load()
+    from the lifespan warm-up; restart to pick up changes.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self._routes: dict[str, tuple[Asset, bool]] | None = None  # URL path -> (asset, immutable)
+        self._assets: dict[str, Asset] = {}
+        self._lock = threading.Lock()  # load() may run in a thread while a request arrives
+
+    def load(self) -> None:
+        if self._routes is not None:
+            return
+        with self._lock:
+            if self._routes is not None:
+                return
+            files = sorted(p for p in self.directory.rglob("*") if p.is_file())
+            sources = {p.relative_to(self.directory).as_posix(): p.read_bytes() for p in files}
+
+            # Referenced files first, so their fingerprints are known when HTML/CSS is rewritten
+            def _rank(path: str) -> int:
+                return {".html": 2, ".css": 1}.get(PurePosixPath(path).suffix, 0)
+
+            routes = {}
+            for path in sorted(sources, key=_rank):
+                body = self._rewrite(path, sources[path])
+                content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+                digest = hashlib.blake2b(body, digest_size=8).hexdigest()
+                asset = self._assets[path] = Asset(body, content_type, digest, "/" + _fingerprinted(path, digest))
+                routes["/" + path] = (asset, False)
+                routes[asset.url] = (asset, True)
+            self._routes = routes
+
+    def _rewrite(self, path: str, body: bytes) -> bytes:
+        suffix = PurePosixPath(path).suffix
+        pattern = {".html": _HTML_REFERENCE, ".css": _CSS_REFERENCE}.get(suffix)
+        if pattern is None:
+            return body
+        base = PurePosixPath(path).parent
+
+        def _replace(match: re.Match) -> str:
+            url = match.group("url").strip()
+            target = url.lstrip("/") if url.startswith("/") else str(base / url)
+            asset = self._assets.get(_normalize(target))
+            if asset is None:
+                return match.group(0)
+            return f'{match.group("prefix")}{match.group("quote")}{asset.url}{match.group("quote")}'
+
+        return pattern.sub(_replace, body.decode("utf-8")).encode("utf-8")
+
+    def response(self, request: Request, path: str | None = None) -> Response:
+        """Serves a frontend file (default: the request path), honouring If-None-Match and Accept-Encoding."""
+        self.load()
+        route = self._routes.get(request.url.path if path is None else "/" + path)
+        if route is None:
+            return PlainTextResponse("Not Found", status_code=404)
+        asset, immutable = route
+
+        headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL}
+        if len(asset.variants) > 1:
+            headers["Vary"] = "Accept-Encoding"
+
+        encoding = _choose_encoding(asset, request.headers.get("accept-encoding", ""))
+        body, etag = asset.variants[encoding]
+        headers["ETag"] = etag
+
+        if _etag_matches(request.headers.get("if-none-match"), asset):
+            return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        if request.method == "HEAD":
+            headers["Content-Length"] = str(len(body))
+            body = b""
+        return Response(body, headers=headers, media_type=asset.content_type)
+
+    async def __call__(self, scope, receive, send) -> None:
+        request = Request(scope, receive)
+        if request.method not in ("GET", "HEAD"):
+            response = PlainTextResponse("Method Not Allowed", status_code=405, headers={"Allow": "GET, HEAD"})
+        else:
+            response = self.response(request)
+        await response(scope, receive, send)
+
+
+def _normalize(path: str) -> str:
+    """Resolves "." and ".." in a relative asset path."""
+    parts: list[str] = []
+    for part in path.split("/"):
+        if part == "..":
+            if parts:
+                parts.pop()
+        elif part and part != ".":
+            parts.append(part)
+    return "/".join(parts)
+
+
+def _etag_matches(header: str | None, asset: Asset) -> bool:
+    """If-None-Match uses weak comparison; any encoding of the same content counts as a match."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    known = {etag for _, etag in asset.variants.values()}
+    return any(tag.strip().removeprefix("W/") in known for tag in header.split(","))
@@ -0,0 +1,53 @@
+import asyncio
+import logging
+import os
+import signal
+import socket
+
+# Importing main loads backend/.env and builds the same caches and clients the web process uses
+from .main import feature_flags, grading_queue, job_idf, run_grading_task, warm_up
+from .services.job_queue import QUEUE_WORKERS
+from .services.llm import close_async_client
+from .services.pdf_parser import shutdown_pdf_pool
+
+"""
+Queue worker — grades tasks submitted through the /async endpoints.
+
+Run from backend/:  python -m app.worker
+Scale with QUEUE_WORKERS (consumers per process) and by starting more processes
+or replicas; every consumer joins the same Redis consumer group.
+"""
+
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    if not os.getenv("OPENAI_API_KEY"):
+        raise RuntimeError("OPENAI_API_KEY is not set. Add it to your .env file.")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    feature_flags.start()
+    job_idf.start()
+    logger.info("Warm-up finished: %s", await warm_up())
+    consumer = f"{socket.gethostname()}-{os.getpid()}"
+    logger.info("Worker %s starting %d consumers", consumer, QUEUE_WORKERS)
+    try:
+        # Each consumer finishes its current task after stop is set, then exits
+        await asyncio.gather(*(
+            grading_queue.consume(f"{consumer}-{i}", run_grading_task, stop)
+            for i in range(QUEUE_WORKERS)
+        ))
+    finally:
+        await feature_flags.stop()
+        await job_idf.stop()
+        await close_async_client()
+        shutdown_pdf_pool()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(main())
@@ -0,0 +1,67 @@
+"""
+Micro-benchmark: single-pass skill matcher vs the old per-skill regex loop.
+
+Run from backend/:
+    python -m benchmarks.bench_extract_skills
+"""
+import random
+import re
+import timeit
+
+from app.services.scoring_engine import COMMON_SKILLS, _build_skill_matcher, _extract_skills, _normalize
+
+FILLER = "team built delivered product customers improved the of and with using for".split()
+
+
+def _legacy_extract_skills(text: str, skills=COMMON_SKILLS):
+    # The original implementation: one regex compile + search per skill
+    normalized = _normalize(text)
+    found = set()
+    for skill in skills:
+        pattern = r"\b" + re.escape(skill) + r"\b"
+        if re.search(pattern, normalized):
+            found.add(skill)
+    return found
+
+
+def _make_text(words: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    vocab = FILLER * 5 + sorted(COMMON_SKILLS)
+    return " ".join(rng.choice(vocab) for _ in range(words))
+
+
+def _synthetic_skills(n: int) -> set[str]:
+    rng = random.Random(n)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return set(COMMON_SKILLS) | {
+        "".join(rng.choice(letters) for _ in range(rng.randint(3, 10))) for _ in range(n)
+    }
+
+
+def _bench(label: str, fn, number: int) -> float:
+    seconds = timeit.timeit(fn, number=number) / number
+    print(f"  {label:<28} {seconds * 1e6:10.1f} µs/call")
+    return seconds
+
+
+def main():
+    for words in (300, 3000):
+        text = _make_text(words)
+        print(f"{words} words, {len(COMMON_SKILLS)} skills")
+        old = _bench("legacy per-skill loop", lambda: _legacy_extract_skills(text), 200)
+        new = _bench("single-pass matcher", lambda: _extract_skills(text), 200)
+        print(f"  speedup: {old / new:.1f}x")
+
+    text = _make_text(3000)
+    for size in (1_000, 5_000):
+        skills = _synthetic_skills(size)
+        matcher = _build_skill_matcher(skills)
+        normalized = _normalize(text)
+        print(f"3000 words, {len(skills)} skills")
+        old = _bench("legacy per-skill loop", lambda: _legacy_extract_skills(text, skills), 5)
+        new = _bench("single-pass matcher", lambda: {m.group(1) for m in matcher.finditer(normalized)}, 50)
+        print(f"  speedup: {old / new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
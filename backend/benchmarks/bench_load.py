@@ -0,0 +1,152 @@
+"""
+Load driver: runs the ASGI app in-process (lifespan included) against the fake
+OpenAI server and a Redis stand-in, and reports throughput and p50/p95/p99
+latency per endpoint scenario.
+
+Run from backend/:
+    python -m benchmarks.bench_load --concurrency 32 --requests 400 --output results/load.json
+    python -m benchmarks.bench_load --latency 1.5 --error-rate 0.2   # degraded upstream
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from collections import Counter
+
+import httpx
+
+from benchmarks.common import latency_summary, write_results
+from benchmarks.corpus import Corpus, resume_text
+from benchmarks.fake_openai import FakeOpenAIServer, FaultConfig
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=400, help="requests per scenario")
+    parser.add_argument("--latency", type=float, default=0.3, help="fake OpenAI base latency, seconds")
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--scenarios", help="comma-separated subset of scenario names")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+async def _run_scenario(client, make_request, total: int, concurrency: int) -> dict:
+    latencies: list[float] = []
+    statuses: Counter[str] = Counter()
+    counter = iter(range(total))
+
+    async def _user():
+        for i in counter:
+            method, url, kwargs = make_request(i)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                await response.aread()
+                statuses[str(response.status_code)] += 1
+            except Exception as e:
+                statuses[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(_user() for _ in range(concurrency)))
+    seconds = time.perf_counter() - start
+
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "seconds": round(seconds, 3),
+        "throughput_rps": round(total / seconds, 2),
+        "status_counts": dict(statuses),
+        "latency": latency_summary(latencies),
+    }
+
+
+def _scenarios(corpus: Corpus, seed: int) -> dict:
+    jobs, resumes = corpus.jobs, corpus.resumes
+
+    def _unique_text(i: int) -> dict:
+        # A freshly generated resume, so the caches and the near-duplicate tier miss.
+        # It lists the job's required skills so most of these pass the keyword pre-screen.
+        job = jobs[i % len(jobs)]
+        required = [line for line in job.splitlines() if "years with" in line]
+        resume = resume_text(random.Random(f"{seed}-{i}")) + "\n" + "\n".join(required)
+        return {"json": {"job_description": job, "resume_text": resume}}
+
+    def _repeat_text(i: int) -> dict:
+        # A small hot set: after the first round, served from the caches
+        return {"json": {"job_description": jobs[0], "resume_text": resumes[i % 5] + "\n" + jobs[0]}}
+
+    def _pdf(i: int) -> dict:
+        index = i % len(resumes)
+        return {
+            "data": {"job_description": jobs[i % len(jobs)]},
+            "files": {"resume_pdf": (f"resume_{index}.pdf", corpus.pdf(index), "application/pdf")},
+        }
+
+    def _rank(i: int) -> dict:
+        return {"json": {"job_description": jobs[i % len(jobs)], "resume_texts": resumes, "top_k": 10}}
+
+    return {
+        "health": lambda i: ("GET", "/health", {}),
+        "grade_resume/unique": lambda i: ("POST", "/grade_resume/", _unique_text(i)),
+        "grade_resume/repeat": lambda i: ("POST", "/grade_resume/", _repeat_text(i)),
+        "grade_resume/stream": lambda i: ("POST", "/grade_resume/stream", _unique_text(i + 1_000_000)),
+        "grade_resume_pdf": lambda i: ("POST", "/grade_resume_pdf/", _pdf(i)),
+        "rank_resumes/200": lambda i: ("POST", "/rank_resumes/", _rank(i)),
+    }
+
+
+def main():
+    args = _parse_args()
+    fault = FaultConfig(args.latency, args.jitter, args.error_rate, args.rate_limit_rate, seed=args.seed)
+
+    with FakeOpenAIServer(fault) as fake:
+        # Everything the app reads at import time has to be set first
+        os.environ["OPENAI_API_KEY"] = "benchmark"
+        os.environ["OPENAI_BASE_URL"] = fake.base_url
+        os.environ.setdefault("RATE_LIMIT_MAX", str(10 ** 9))
+        os.environ.setdefault("BATCH_RATE_LIMIT_MAX", str(10 ** 9))
+        os.environ.setdefault("STATS_SECRET", "benchmark")
+
+        from benchmarks import redis_standin
+        redis_label = redis_standin.install()
+
+        from app import main as app_main
+
+        corpus = Corpus(seed=args.seed, jobs=10, resumes=200)
+        scenarios = _scenarios(corpus, args.seed)
+        if args.scenarios:
+            wanted = args.scenarios.split(",")
+            scenarios = {name: make for name, make in scenarios.items() if name in wanted}
+
+        async def _run() -> dict:
+            results = {}
+            transport = httpx.ASGITransport(app=app_main.app)
+            async with app_main.app.router.lifespan_context(app_main.app):
+                async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+                    for name, make_request in scenarios.items():
+                        print(f"running {name} ...", flush=True)
+                        results[name] = await _run_scenario(client, make_request, args.requests, args.concurrency)
+                    stats = (await client.get("/stats", params={"key": os.getenv("STATS_SECRET", "")})).json()
+            return {"scenarios": results, "app_stats": stats}
+
+        outcome = asyncio.run(_run())
+
+    write_results("load", {
+        "redis": redis_label,
+        "fake_openai": {
+            "latency": args.latency, "jitter": args.jitter,
+            "error_rate": args.error_rate, "rate_limit_rate": args.rate_limit_rate,
+            "requests_served": fault.requests,
+        },
+        **outcome,
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
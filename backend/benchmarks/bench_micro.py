@@ -0,0 +1,136 @@
+"""
+Micro-benchmarks for the hot per-request functions, written as JSON so two
+commits can be compared.
+
+Run from backend/:
+    python -m benchmarks.bench_micro --output results/micro.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import timeit
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from benchmarks import redis_standin
+
+REDIS_LABEL = redis_standin.install()
+
+from fastapi.encoders import jsonable_encoder
+from starlette.requests import Request
+
+from app.middleware.redis_rate_limiter import RedisRateLimiter
+from app.services.cache import encode_value, llm_cache_key, normalize_job_description, pdf_content_hash
+from app.services.compaction import compact_resume
+from app.services.pdf_parser import extract_text_from_pdf_bytes
+from app.services.redis_client import get_redis
+from app.services.resume_grader import parse_evaluation
+from app.services.scoring_engine import _extract_skills, score_matrix, score_resume, skill_matrix, skill_vector
+from app.services.serialization import dumps
+from app.services.similarity_cache import fingerprint
+
+from benchmarks.common import write_results
+from benchmarks.corpus import Corpus, make_pdf
+
+
+def _measure(fn, min_time: float) -> dict:
+    """Calls fn in growing batches until a batch takes min_time, then reports per-call time."""
+    number = 1
+    while True:
+        seconds = timeit.timeit(fn, number=number)
+        if seconds >= min_time or number >= 1_000_000:
+            break
+        number *= 4 if seconds < min_time / 8 else 2
+    runs = [timeit.timeit(fn, number=number) / number for _ in range(3)]
+    return {"us_per_call": round(min(runs) * 1e6, 3), "calls_per_run": number}
+
+
+def _request(ip: str, path: str = "/grade_resume/") -> Request:
+    return Request({
+        "type": "http", "method": "POST", "path": path, "headers": [],
+        "client": (ip, 1234), "query_string": b"", "server": ("bench", 80), "scheme": "http",
+    })
+
+
+async def _async_rate(check, requests: list[Request], rounds: int) -> dict:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for request in requests:
+            try:
+                await check(request)
+            except Exception:
+                pass
+    seconds = time.perf_counter() - start
+    return {"us_per_call": round(seconds / (rounds * len(requests)) * 1e6, 3), "calls_per_run": rounds * len(requests)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per measurement batch")
+    args = parser.parse_args()
+
+    corpus = Corpus(seed=0, jobs=5, resumes=50)
+    short_resume = corpus.resumes[0]
+    long_resume = "\n".join(corpus.resumes[:10])
+    job = corpus.jobs[0]
+    rng = random.Random(0)
+    results: dict[str, dict] = {}
+
+    # Skill extraction and scoring
+    results["extract_skills/resume"] = _measure(lambda: _extract_skills(short_resume), args.min_time)
+    results["extract_skills/10_resumes"] = _measure(lambda: _extract_skills(long_resume), args.min_time)
+    matrix = skill_matrix(corpus.resumes * 20)
+    job_vector = skill_vector(job)
+    results["score_matrix/1000_resumes"] = _measure(lambda: score_matrix(matrix, job_vector), args.min_time)
+
+    # PDF text extraction (pypdf, in this process)
+    for pages in (1, 5, 20):
+        pdf = make_pdf("\n".join(rng.choice(corpus.resumes) for _ in range(pages * 2)), lines_per_page=55)
+        results[f"extract_text_from_pdf_bytes/{pages}_pages"] = {
+            **_measure(lambda: extract_text_from_pdf_bytes(pdf), args.min_time),
+            "bytes": len(pdf),
+        }
+
+    # Hashing, normalization and cache encoding
+    normalized = normalize_job_description(job)
+    pdf = corpus.pdf(0)
+    results["normalize_job_description"] = _measure(lambda: normalize_job_description(job), args.min_time)
+    results["llm_cache_key"] = _measure(lambda: llm_cache_key(job, short_resume), args.min_time)
+    results["llm_cache_key/prenormalized"] = _measure(lambda: llm_cache_key(job, short_resume, normalized), args.min_time)
+    results["pdf_content_hash"] = {**_measure(lambda: pdf_content_hash(pdf), args.min_time), "bytes": len(pdf)}
+    evaluation = {"match_score": 70, "summary": "x" * 300, "strengths": ["a" * 80] * 4, "gaps": ["b" * 80] * 4}
+    results["encode_value/evaluation"] = _measure(lambda: encode_value(evaluation), args.min_time)
+
+    # Grading response body: FastAPI's default encoder vs the cached, pre-encoded evaluation
+    raw_model_output = json.dumps(evaluation)
+    cached = parse_evaluation(raw_model_output).to_json()
+    keyword_score = score_resume(short_resume, job)
+    body = {"evaluation": evaluation, "keyword_score": keyword_score}
+    results["parse_evaluation"] = _measure(lambda: parse_evaluation(raw_model_output), args.min_time)
+    results["response_body/jsonable_encoder"] = _measure(
+        lambda: json.dumps(jsonable_encoder(body), ensure_ascii=False, separators=(",", ":")).encode(), args.min_time,
+    )
+    results["response_body/pre_encoded"] = _measure(
+        lambda: dumps({"evaluation": cached, "keyword_score": keyword_score}), args.min_time,
+    )
+    results["compact_resume"] = _measure(lambda: compact_resume(long_resume), args.min_time)
+    results["similarity_fingerprint"] = _measure(lambda: fingerprint(short_resume), args.min_time)
+
+    # Rate limiters: 1000 clients, all under the limit (the common case)
+    requests = [_request(f"10.0.{i // 256}.{i % 256}") for i in range(1000)]
+    limiter = RedisRateLimiter(get_redis(), max_requests=1_000_000, window_seconds=3600)
+
+    async def _rate_limiters():
+        results["rate_limiter/redis"] = await _async_rate(limiter.check_rate_limit, requests, 2)
+
+    asyncio.run(_rate_limiters())
+
+    write_results("micro", {"redis": REDIS_LABEL, "timings": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Micro-benchmark: ranking an applicant pool with v1 score_resume per resume
+vs v2 (one skill matrix + a single vectorized scoring pass).
+
+Run from backend/:
+    python -m benchmarks.bench_rank_resumes
+"""
+import random
+import time
+
+from app.services.scoring_engine import COMMON_SKILLS, score_matrix, score_resume, skill_matrix, skill_vector
+
+FILLER = "team built delivered product customers improved the of and with using for".split()
+
+
+def _make_text(words: int, rng: random.Random) -> str:
+    vocab = FILLER * 5 + sorted(COMMON_SKILLS)
+    return " ".join(rng.choice(vocab) for _ in range(words))
+
+
+def _time(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    rng = random.Random(0)
+    job_text = _make_text(200, rng)
+    job_vector = skill_vector(job_text)
+
+    for pool in (1_000, 5_000):
+        resumes = [_make_text(400, rng) for _ in range(pool)]
+        print(f"{pool} resumes x 400 words")
+
+        v1 = _time(lambda: [score_resume(text, job_text) for text in resumes])
+        print(f"  v1 score_resume loop       {v1 * 1e3:10.1f} ms")
+
+        matrix_time = _time(lambda: skill_matrix(resumes))
+        matrix = skill_matrix(resumes)
+        score_time = _time(lambda: score_matrix(matrix, job_vector))
+        print(f"  v2 build skill matrix      {matrix_time * 1e3:10.1f} ms")
+        print(f"  v2 vectorized scoring      {score_time * 1e3:10.1f} ms")
+        # Stored vectors are the common case when re-ranking a pool against new postings
+        print(f"  re-rank speedup (scoring only): {v1 / score_time:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
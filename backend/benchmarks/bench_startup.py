@@ -0,0 +1,143 @@
+"""
+Cold-start benchmark: how long `import app.main` takes, and how long a fresh
+uvicorn process needs until /health (liveness) and /ready (warm-up finished)
+answer 200. Each run is a new interpreter, so nothing is cached in-process.
+
+Run from backend/:
+    python -m benchmarks.bench_startup --output results/startup.json
+
+The server runs in a subprocess, so fakeredis can't be swapped in: it uses
+BENCH_REDIS_URL if set, else REDIS_URL. With no Redis reachable the warm-up's
+Redis step fails fast and the app starts anyway (it fails open).
+"""
+import argparse
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from benchmarks.common import write_results
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# "import time: self [us] | cumulative | name" — indentation of the name shows nesting
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def _env() -> dict:
+    env = {**os.environ, "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "benchmark")}
+    if os.getenv("BENCH_REDIS_URL"):
+        env["REDIS_URL"] = os.environ["BENCH_REDIS_URL"]
+    return env
+
+
+def measure_import(runs: int) -> dict:
+    """Wall time of `import app.main` in a fresh interpreter, plus its heaviest direct imports."""
+    wall = []
+    heaviest: dict[str, list[float]] = {}
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import app.main"],
+            cwd=BACKEND_DIR, env=_env(), capture_output=True, text=True, check=True,
+        )
+        wall.append(time.perf_counter() - start)
+
+        # Lines come out children first: the two-space-indented lines before
+        # the "app.main" line are its direct imports
+        children: dict[str, float] = {}
+        for match in IMPORT_TIME_LINE.finditer(result.stderr):
+            _, cumulative, indent, name = match.groups()
+            if len(indent) == 2:
+                children[name] = int(cumulative) / 1e3
+            elif not indent:
+                if name == "app.main":
+                    break
+                children = {}
+        for name, ms in children.items():
+            heaviest.setdefault(name, []).append(ms)
+
+    top = sorted(((statistics.median(ms), name) for name, ms in heaviest.items()), reverse=True)[:10]
+    return {
+        "runs": runs,
+        "interpreter_plus_import_ms": {
+            "median": round(statistics.median(wall) * 1e3, 1),
+            "min": round(min(wall) * 1e3, 1),
+        },
+        "heaviest_imports_ms": {name: round(ms, 1) for ms, name in top},
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _status(url: str) -> int | None:
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return None  # not listening yet
+
+
+def measure_server(runs: int, timeout: float) -> dict:
+    """Seconds from process start to the first 200 from /health and from /ready."""
+    health, ready = [], []
+    for _ in range(runs):
+        port = _free_port()
+        base = f"http://127.0.0.1:{port}"
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+             "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=_env(),
+        )
+        try:
+            health_at = ready_at = None
+            while ready_at is None and time.perf_counter() - start < timeout:
+                if health_at is None and _status(f"{base}/health") == 200:
+                    health_at = time.perf_counter() - start
+                if health_at is not None and _status(f"{base}/ready") == 200:
+                    ready_at = time.perf_counter() - start
+                time.sleep(0.005)
+            if ready_at is None:
+                raise SystemExit(f"Server on port {port} wasn't ready after {timeout}s")
+            health.append(health_at)
+            ready.append(ready_at)
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+
+    def _summary(values: list[float]) -> dict:
+        return {"median": round(statistics.median(values) * 1e3, 1), "max": round(max(values) * 1e3, 1)}
+
+    return {"runs": runs, "first_health_200_ms": _summary(health), "first_ready_200_ms": _summary(ready)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60, help="seconds to wait for /ready per run")
+    args = parser.parse_args()
+
+    results = {
+        "redis": os.getenv("BENCH_REDIS_URL") or os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+        "import": measure_import(args.runs),
+        "server": measure_server(args.runs, args.timeout),
+    }
+    write_results("startup", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
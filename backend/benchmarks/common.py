@@ -0,0 +1,60 @@
+"""
+Helpers shared by the benchmarks: percentiles, result metadata, JSON output.
+"""
+import json
+import os
+import platform
+import subprocess
+import time
+from pathlib import Path
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+def latency_summary(seconds: list[float]) -> dict:
+    values = sorted(seconds)
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values) * 1e3, 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1e3, 3),
+        "p95_ms": round(percentile(values, 95) * 1e3, 3),
+        "p99_ms": round(percentile(values, 99) * 1e3, 3),
+        "max_ms": round(values[-1] * 1e3, 3) if values else 0.0,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parent, capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def metadata() -> dict:
+    """Enough context to tell two result files apart: commit, interpreter, machine."""
+    return {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def write_results(name: str, results: dict, output: str | None) -> None:
+    """Prints the results and, with --output, writes {"benchmark", "meta", "results"} as JSON."""
+    document = {"benchmark": name, "meta": metadata(), "results": results}
+    text = json.dumps(document, indent=2)
+    print(text)
+    if output:
+        Path(output).parent.mkdir(parents=True, exist_ok=True)
+        Path(output).write_text(text + "\n")
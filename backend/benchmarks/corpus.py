@@ -0,0 +1,139 @@
+"""
+Synthetic corpus: job descriptions, resume text and resume PDFs.
+
+Everything is generated from a seed, so two runs (and two commits) see the
+same documents. PDFs are written by hand — one Helvetica text object per
+line — so no PDF library beyond pypdf is needed to read them back.
+
+Write a corpus to disk, e.g. to try it in the UI:
+    python -m benchmarks.corpus --out /tmp/corpus --resumes 50 --jobs 5
+"""
+import argparse
+import random
+from pathlib import Path
+
+from app.services.scoring_engine import COMMON_SKILLS
+
+_SKILLS = sorted(COMMON_SKILLS)
+_TITLES = ["Backend Engineer", "Data Scientist", "Frontend Developer", "DevOps Engineer", "ML Engineer"]
+_COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries"]
+_VERBS = ["Built", "Designed", "Led", "Maintained", "Migrated", "Optimized", "Shipped", "Automated"]
+_OBJECTS = [
+    "a billing service", "the data pipeline", "an internal dashboard", "the search API",
+    "CI/CD for 40 services", "a recommendation model", "the mobile backend", "monitoring and alerting",
+]
+_OUTCOMES = [
+    "cutting latency by 40%", "serving 2M requests a day", "saving $120k a year",
+    "for a team of 8", "with 99.95% uptime", "ahead of schedule",
+]
+
+
+def job_description(rng: random.Random, skills: int = 8) -> str:
+    title = rng.choice(_TITLES)
+    required = rng.sample(_SKILLS, skills)
+    nice = rng.sample(_SKILLS, 3)
+    return "\n".join([
+        f"{title} at {rng.choice(_COMPANIES)}",
+        "",
+        "What you'll do",
+        *(f"- {rng.choice(_VERBS)} {rng.choice(_OBJECTS)} using {skill}" for skill in required[:4]),
+        "",
+        "Requirements",
+        *(f"- {rng.randint(2, 8)}+ years with {skill}" for skill in required),
+        "",
+        "Nice to have",
+        *(f"- {skill}" for skill in nice),
+        "",
+        "Benefits",
+        "- Remote friendly, health insurance, 401k",
+    ])
+
+
+def resume_text(rng: random.Random, jobs: int = 3, bullets: int = 4) -> str:
+    name = f"Candidate {rng.randint(1000, 9999)}"
+    skills = rng.sample(_SKILLS, rng.randint(4, 14))
+    lines = [name, f"{name.lower().replace(' ', '.')}@example.com", "", "Summary",
+             f"Engineer with {rng.randint(1, 15)} years of experience in {', '.join(skills[:3])}.", "",
+             "Experience"]
+    for _ in range(jobs):
+        lines.append(f"{rng.choice(_TITLES)} - {rng.choice(_COMPANIES)} ({rng.randint(2010, 2020)}-{rng.randint(2021, 2025)})")
+        for _ in range(bullets):
+            lines.append(
+                f"- {rng.choice(_VERBS)} {rng.choice(_OBJECTS)} with {rng.choice(skills)}, {rng.choice(_OUTCOMES)}"
+            )
+    lines += ["", "Skills", ", ".join(skills), "", "Education", "B.Sc. Computer Science"]
+    return "\n".join(lines)
+
+
+def _escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)").encode("latin-1", "replace").decode("latin-1")
+
+
+def make_pdf(text: str, lines_per_page: int = 55) -> bytes:
+    """Minimal valid PDF with the text laid out line by line, paginated."""
+    lines = text.splitlines() or [""]
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)]
+
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + i * 2} 0 R" for i in range(len(pages)))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode())
+    font = 3 + len(pages) * 2
+    for i, page in enumerate(pages):
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + i * 2} 0 R "
+            f"/Resources << /Font << /F1 {font} 0 R >> >> >>".encode()
+        )
+        stream = "\n".join(
+            f"BT /F1 10 Tf 50 {760 - j * 13} Td ({_escape(line)}) Tj ET" for j, line in enumerate(page)
+        ).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+class Corpus:
+    """A fixed set of JDs and resumes (text + PDF) for one benchmark run."""
+
+    def __init__(self, seed: int = 0, jobs: int = 10, resumes: int = 200):
+        rng = random.Random(seed)
+        self.jobs = [job_description(rng) for _ in range(jobs)]
+        self.resumes = [resume_text(rng, jobs=rng.randint(2, 5)) for _ in range(resumes)]
+        self._pdfs: dict[int, bytes] = {}
+
+    def pdf(self, index: int) -> bytes:
+        if index not in self._pdfs:
+            self._pdfs[index] = make_pdf(self.resumes[index])
+        return self._pdfs[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--jobs", type=int, default=5)
+    parser.add_argument("--resumes", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = Corpus(args.seed, args.jobs, args.resumes)
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    for i, jd in enumerate(corpus.jobs):
+        (out / f"job_{i:03d}.txt").write_text(jd)
+    for i in range(len(corpus.resumes)):
+        (out / f"resume_{i:04d}.pdf").write_bytes(corpus.pdf(i))
+    print(f"Wrote {len(corpus.jobs)} job descriptions and {len(corpus.resumes)} resume PDFs to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Fake OpenAI-compatible server for offline benchmarks.
+
+Implements POST /v1/chat/completions (plain and stream=true) and answers with
+a valid evaluation JSON. Latency and failures are injected on purpose:
+- latency: base seconds plus exponential jitter
+- error_rate: share of requests answered with 500
+- rate_limit_rate: share answered with 429
+
+Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:<port>/v1.
+Standalone:
+    python -m benchmarks.fake_openai --port 8100 --latency 0.8 --error-rate 0.05
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import socket
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+class FaultConfig:
+    def __init__(self, latency: float = 0.5, jitter: float = 0.2, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.rng = random.Random(seed)
+        self.requests = 0
+
+    def delay(self) -> float:
+        return self.latency + (self.rng.expovariate(1 / self.jitter) if self.jitter > 0 else 0)
+
+
+def _evaluation(messages: list[dict]) -> str:
+    # Deterministic per prompt, so repeated inputs get the same answer like a cached model would
+    digest = hashlib.blake2b(json.dumps(messages).encode(), digest_size=4).digest()
+    return json.dumps({
+        "match_score": digest[0] % 101,
+        "summary": "Synthetic evaluation from the benchmark server.",
+        "strengths": ["Relevant experience", "Clear impact statements", "Good skills coverage"],
+        "gaps": ["Missing some required tools", "Limited leadership examples", "No certifications"],
+        "improvements": ["Quantify more results", "Mirror the job's keywords", "Tighten the summary"],
+    })
+
+
+def create_app(config: FaultConfig) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        config.requests += 1
+        await asyncio.sleep(config.delay())
+
+        roll = config.rng.random()
+        if roll < config.error_rate:
+            return JSONResponse({"error": {"message": "injected failure", "type": "server_error"}}, status_code=500)
+        if roll < config.error_rate + config.rate_limit_rate:
+            return JSONResponse({"error": {"message": "injected rate limit", "type": "rate_limit"}}, status_code=429)
+
+        content = _evaluation(body.get("messages", []))
+        base = {"id": f"chatcmpl-{config.requests}", "created": int(time.time()), "model": body.get("model", "fake")}
+
+        if body.get("stream"):
+            async def _chunks():
+                for start in range(0, len(content), 24):
+                    chunk = {**base, "object": "chat.completion.chunk", "choices": [
+                        {"index": 0, "delta": {"content": content[start:start + 24]}, "finish_reason": None}
+                    ]}
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                    await asyncio.sleep(0)
+                done = {**base, "object": "chat.completion.chunk",
+                        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+                yield f"data: {json.dumps(done)}\n\ndata: [DONE]\n\n"
+
+            return StreamingResponse(_chunks(), media_type="text/event-stream")
+
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in body.get("messages", [])) // 4
+        return {
+            **base,
+            "object": "chat.completion",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 80, "total_tokens": prompt_tokens + 80},
+        }
+
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class FakeOpenAIServer:
+    """Runs the fake server in a background thread; use as a context manager."""
+
+    def __init__(self, config: FaultConfig | None = None, port: int | None = None):
+        self.config = config or FaultConfig()
+        self.port = port or _free_port()
+        self._server = uvicorn.Server(uvicorn.Config(
+            create_app(self.config), host="127.0.0.1", port=self.port, log_level="warning",
+        ))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    config = FaultConfig(args.latency, args.jitter, args.error_rate, args.rate_limit_rate)
+    uvicorn.run(create_app(config), host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
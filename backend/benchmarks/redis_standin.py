@@ -0,0 +1,29 @@
+"""
+Redis for benchmarks.
+
+With BENCH_REDIS_URL set (e.g. a local `redis-server`), the app's clients are
+pointed at it. Otherwise they are replaced by in-process fakeredis clients
+sharing one server — Lua scripts need the `lupa` extra, see requirements.txt
+in this directory. Must run before app.main is imported.
+"""
+import os
+
+
+def install() -> str:
+    """Wires the app's Redis clients and returns a label for the results."""
+    url = os.getenv("BENCH_REDIS_URL")
+    if url:
+        os.environ["REDIS_URL"] = url
+        return f"redis-server ({url})"
+
+    try:
+        import fakeredis
+    except ImportError:
+        raise SystemExit("Install benchmarks/requirements.txt, or set BENCH_REDIS_URL to a running redis-server.")
+
+    from app.services import redis_client
+
+    server = fakeredis.FakeServer()
+    redis_client._redis = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+    redis_client._redis_bytes = fakeredis.FakeAsyncRedis(server=server, decode_responses=False)
+    return "fakeredis (in-process)"